@@ -1,6 +1,6 @@
 """Implementation of the actor critic model."""
 
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 from pathlib import Path
 
 import numpy as np
@@ -56,6 +56,9 @@ class ActorCriticModel(tf.keras.Model):
 
     def call(self, inputs: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
         """Return probability distribution for actions and value estimate for state."""
+        # uint8 observations are stored unscaled
+        if inputs.dtype == tf.uint8:
+            inputs = tf.cast(inputs, tf.float32) / 255.0
         x = self.common(inputs)
         return self.actor(x), self.critic(x)
 
@@ -75,3 +78,34 @@ def initialize_model(
     if weights_path:
         model.load_weights(weights_path)
     return model
+
+
+def create_act_function(
+    model: ActorCriticModel, observation: np.ndarray, jit_compile: bool = False
+) -> Callable:
+    """Compile function returning sampled actions and value estimates for batch of states.
+
+    Sampling is done in graph with stateless seed of shape (2,), so actions are reproducible
+    with NumPy seeding. Use tf.config.run_functions_eagerly(True) to debug the function.
+    """
+
+    @tf.function(
+        input_signature=[
+            tf.TensorSpec(shape=(None,) + observation.shape, dtype=observation.dtype),
+            tf.TensorSpec(shape=(2,), dtype=tf.int32),
+        ],
+        jit_compile=jit_compile,
+    )
+    def act(states: tf.Tensor, seed: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        action_logits, value_estimates = model(states)
+        actions = tf.random.stateless_categorical(
+            logits=action_logits, num_samples=1, seed=seed, dtype=tf.int32
+        )
+        return actions[:, 0], value_estimates[:, 0]
+
+    return act
+
+
+def sample_seed() -> np.ndarray:
+    """Draw seed for act function from NumPy random state."""
+    return np.random.randint(np.iinfo(np.int32).max, size=2, dtype=np.int32)
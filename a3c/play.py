@@ -7,13 +7,14 @@ sys.path.append(os.getcwd())
 import argparse
 from pathlib import Path
 
-import numpy as np
 import tensorflow as tf
 
 from game.snake import Snake
 from game.rl_game import RLGame
-from game.data_structures import Direction
-from a3c.model.actor_critic_model import initialize_model
+from game.data_structures import Direction, ObservationMode
+from a3c.model.actor_critic_model import create_act_function, initialize_model, sample_seed
+from evaluation.pool import evaluate_parallel
+from evaluation.runner import DEFAULT_MAX_STEPS, summarize_results
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -24,28 +25,92 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--weights_path", type=Path, default=None, help="Path to model weights (.keras)"
     )
+    parser.add_argument(
+        "--observation_mode",
+        type=str,
+        default=ObservationMode.PIXELS,
+        choices=[ObservationMode.PIXELS, ObservationMode.GRID],
+        help="Render observations as pixels or as compact grid tensors.",
+    )
+    parser.add_argument(
+        "--observation_dtype",
+        type=str,
+        default=None,
+        choices=["uint8", "float16", "float32", "float64"],
+        help="Data type of observation frames. Defaults to float64 pixels and float32 grids.",
+    )
+    parser.add_argument(
+        "--body_age", action="store_true", help="Add body age channel to grid observations."
+    )
+    parser.add_argument(
+        "--run_eagerly", action="store_true", help="Run compiled model inference eagerly."
+    )
+    parser.add_argument(
+        "--jit_compile", action="store_true", help="Compile model inference with XLA."
+    )
     parser.add_argument(
         "--episodes", type=int, default=10, help="Specify how many episodes game is running."
     )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Evaluate episodes without game window in parallel processes.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first evaluation episode.")
     return parser.parse_args()
 
 
+def evaluate(args: argparse.Namespace):
+    """Play episodes in parallel processes and print statistics."""
+    results = evaluate_parallel(
+        agent_name="a3c",
+        grid_size=args.grid_size,
+        episodes=args.episodes,
+        processes=args.processes,
+        max_steps=DEFAULT_MAX_STEPS,
+        seed=args.seed,
+        weights_path=args.weights_path,
+        observation_mode=args.observation_mode,
+        observation_dtype=args.observation_dtype,
+        body_age=args.body_age,
+    )
+    summary = summarize_results(results=results)
+    print(
+        f"episodes: {summary['episodes']}, "
+        f"score: {summary['score_mean']:.2f} (p50 {summary['score_p50']:.0f}, "
+        f"p90 {summary['score_p90']:.0f}), "
+        f"win rate: {summary['win_rate']:.2f}, "
+        f"episode length: {summary['episode_length_mean']:.0f}"
+    )
+
+
 def main():
     args = parse_arguments()
+    if args.processes > 1:
+        evaluate(args=args)
+        return
+
     snake = Snake()
-    env = RLGame(grid_size=args.grid_size, snake=snake, show_game=True)
-    model = initialize_model(
-        observation=env.get_observation(), action_size=4, weights_path=args.weights_path
+    env = RLGame(
+        grid_size=args.grid_size,
+        snake=snake,
+        show_game=True,
+        observation_mode=args.observation_mode,
+        observation_dtype=args.observation_dtype,
+        body_age=args.body_age,
     )
+    tf.config.run_functions_eagerly(args.run_eagerly)
+    observation = env.get_observation()
+    model = initialize_model(observation=observation, action_size=4, weights_path=args.weights_path)
+    act = create_act_function(model=model, observation=observation, jit_compile=args.jit_compile)
     env.reset_game()
 
     episode_idx = 0
     while episode_idx < args.episodes:
         state = env.get_observation()
-        action_logits, value = model(tf.expand_dims(state, 0))
-        probs = tf.nn.softmax(action_logits)
-        action = np.random.choice(4, p=probs.numpy()[0])
-        new_direction = Direction.map_action_to_direction(action=action)
+        actions, _ = act(tf.expand_dims(state, 0), sample_seed())
+        new_direction = Direction(int(actions[0]))
         env.snake.update_direction(new_direction=new_direction)
 
         # Take a step
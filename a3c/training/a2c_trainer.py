@@ -0,0 +1,263 @@
+"""Synchronous A2C training on vectorized Snake games."""
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+from keras.optimizers import Adam
+
+from game.vector_rl_game import VectorRLGame
+from a3c.model.actor_critic_model import create_act_function, initialize_model, sample_seed
+from a3c.training.checkpoint import Checkpointer, find_latest_checkpoint, load_checkpoint
+from a3c.training.losses import LossConfig, compute_actor_critic_loss, get_total_loss
+from a3c.training.support import LogFormat, TrainingLogger
+
+
+class A2CTrainer:
+    """Train actor-critic model with games stepped in lockstep.
+
+    Every tick does one batched forward pass for all games and every rollout applies one
+    gradient update. Game index is logged as worker index.
+    """
+
+    def __init__(
+        self,
+        save_dir: Path,
+        grid_size: int,
+        number_of_games: int,
+        weights_path: Optional[Path] = None,
+        observation_dtype: Optional[str] = None,
+        seed: Optional[int] = None,
+        run_eagerly: bool = False,
+        jit_compile: bool = False,
+        resume: bool = False,
+        keep_checkpoints: Optional[int] = 3,
+        loss_config: Optional[LossConfig] = None,
+    ):
+        self.save_dir = save_dir
+        self.grid_size = grid_size
+        self.number_of_games = number_of_games
+        self.keep_checkpoints = keep_checkpoints
+        self.loss_config = loss_config or LossConfig()
+        self.global_episode: int = 0
+        self.moving_average: list[float] = []
+        tf.config.run_functions_eagerly(run_eagerly)
+        self.env = VectorRLGame(
+            number_of_games=number_of_games,
+            grid_size=grid_size,
+            seed=seed,
+            observation_dtype=observation_dtype or np.float64,
+        )
+
+        self.observation = self.env.reset_game()[0]
+        observation = self.observation
+        self.global_model = initialize_model(
+            observation=observation, action_size=4, weights_path=weights_path
+        )
+        self.optimizer = Adam(learning_rate=0.0001)
+        self.act = create_act_function(
+            model=self.global_model, observation=observation, jit_compile=jit_compile
+        )
+        self.train_step = tf.function(
+            self.apply_gradients,
+            input_signature=[
+                tf.TensorSpec(shape=(None, None) + observation.shape, dtype=observation.dtype),
+                tf.TensorSpec(shape=(None, None), dtype=tf.int32),
+                tf.TensorSpec(shape=(None, None), dtype=tf.float32),
+                tf.TensorSpec(shape=(None, None), dtype=tf.bool),
+                tf.TensorSpec(shape=(None,), dtype=tf.float32),
+                tf.TensorSpec(shape=(), dtype=tf.float32),
+            ],
+            jit_compile=jit_compile,
+        )
+        if resume:
+            self.resume()
+
+    def resume(self):
+        """Continue from the latest checkpoint in save_dir."""
+        filepath = find_latest_checkpoint(save_dir=self.save_dir)
+        if filepath is None:
+            print(f"No checkpoint found in {self.save_dir}, starting new training.")
+            return
+        checkpoint = load_checkpoint(
+            filepath=filepath, model=self.global_model, optimizer=self.optimizer, rng=self.env.rng
+        )
+        self.global_episode = checkpoint["episode"] + 1
+        self.moving_average = checkpoint["moving_average"]
+        print(f"Resuming training from episode {self.global_episode}.")
+
+    def train(
+        self,
+        gamma: float,
+        max_episodes: int,
+        update_freq: int,
+        weights_save_freq: int,
+        log_format: str = LogFormat.CSV,
+    ):
+        """Play rollouts of update_freq steps in all games and update model after each."""
+        with TrainingLogger(
+            filepath=self.save_dir / 'training_log.csv', log_format=log_format
+        ) as logger, Checkpointer(
+            save_dir=self.save_dir,
+            model=self.global_model,
+            optimizer=self.optimizer,
+            observation=self.observation,
+            keep_last=self.keep_checkpoints,
+        ) as checkpointer:
+            self._train(
+                gamma=gamma,
+                max_episodes=max_episodes,
+                update_freq=update_freq,
+                weights_save_freq=weights_save_freq,
+                logger=logger,
+                checkpointer=checkpointer,
+            )
+
+    def _train(
+        self,
+        gamma: float,
+        max_episodes: int,
+        update_freq: int,
+        weights_save_freq: int,
+        logger: TrainingLogger,
+        checkpointer: Checkpointer,
+    ):
+        """Training loop writing progress to logger."""
+        states = self.env.reset_game()
+        episode_rewards = np.zeros(shape=self.number_of_games)
+        episode_steps = np.zeros(shape=self.number_of_games, dtype=np.int32)
+        episode_starts = np.full(shape=self.number_of_games, fill_value=time.perf_counter())
+        moving_average = deque(self.moving_average, maxlen=100)
+        global_episode = self.global_episode
+
+        print("Starting training!")
+        while global_episode < max_episodes:
+            rollout_states = []
+            rollout_actions = []
+            rollout_rewards = []
+            rollout_dones = []
+            finished_episodes = []
+            for _ in range(int(update_freq)):
+                actions, _ = self.act(states, sample_seed())
+                actions = actions.numpy()
+                rollout_states.append(states)
+                rollout_actions.append(actions)
+
+                states, rewards, dones = self.env.step(actions=actions)
+                rollout_rewards.append(rewards)
+                rollout_dones.append(dones)
+
+                episode_rewards += rewards
+                episode_steps += 1
+                now = time.perf_counter()
+                for game_idx in np.flatnonzero(dones):
+                    finished_episodes.append(
+                        (
+                            game_idx,
+                            episode_rewards[game_idx],
+                            episode_steps[game_idx],
+                            now - episode_starts[game_idx],
+                        )
+                    )
+                episode_rewards[dones] = 0
+                episode_steps[dones] = 0
+                episode_starts[dones] = now
+
+            # Value of the states after rollout, ignored for games that just finished
+            _, bootstrap_values = self.act(states, sample_seed())
+            update_start = time.perf_counter()
+            policy_loss, value_loss = self.train_step(
+                np.stack(rollout_states),
+                np.stack(rollout_actions).astype(np.int32),
+                np.stack(rollout_rewards).astype(np.float32),
+                np.stack(rollout_dones),
+                bootstrap_values,
+                gamma,
+            )
+            update_latency = time.perf_counter() - update_start
+
+            for game_idx, reward, steps, duration in finished_episodes:
+                if global_episode >= max_episodes:
+                    break
+                moving_average.append(reward)
+                logger.log_progress(
+                    worker_idx=int(game_idx),
+                    global_episode=global_episode,
+                    reward=float(reward),
+                    reward_moving_average=float(np.mean(moving_average)),
+                    steps=int(steps),
+                    policy_loss=float(policy_loss.numpy()),
+                    value_loss=float(value_loss.numpy()),
+                    steps_per_sec=steps / duration,
+                    update_latency=update_latency,
+                )
+
+                # Save weights
+                if global_episode % weights_save_freq == 0 and global_episode != 0:
+                    checkpointer.save(
+                        episode=global_episode, moving_average=moving_average, rng=self.env.rng
+                    )
+                global_episode += 1
+
+    def apply_gradients(
+        self,
+        states: tf.Tensor,
+        actions: tf.Tensor,
+        rewards: tf.Tensor,
+        dones: tf.Tensor,
+        bootstrap_values: tf.Tensor,
+        gamma: tf.Tensor,
+    ) -> (tf.Tensor, tf.Tensor):
+        """Update model with rollout of shape (steps, games) and return mean losses per game."""
+        with tf.GradientTape() as tape:
+            policy_loss, value_loss, entropy = self.compute_loss(
+                states=states,
+                actions=actions,
+                rewards=rewards,
+                dones=dones,
+                bootstrap_values=bootstrap_values,
+                gamma=gamma,
+            )
+            total_loss = get_total_loss(
+                policy_loss=policy_loss,
+                value_loss=value_loss,
+                entropy=entropy,
+                config=self.loss_config,
+            )
+
+        gradients = tape.gradient(total_loss, self.global_model.trainable_weights)
+        self.optimizer.apply_gradients(zip(gradients, self.global_model.trainable_weights))
+        return policy_loss, value_loss
+
+    def compute_loss(
+        self,
+        states: tf.Tensor,
+        actions: tf.Tensor,
+        rewards: tf.Tensor,
+        dones: tf.Tensor,
+        bootstrap_values: tf.Tensor,
+        gamma: tf.Tensor,
+    ) -> (tf.Tensor, tf.Tensor, tf.Tensor):
+        """Compute A3C worker losses for every game and average them over games."""
+        steps = tf.shape(actions)[0]
+        games = tf.shape(actions)[1]
+
+        # One forward pass over all games and steps
+        action_logits, value_estimates = self.global_model(
+            tf.reshape(states, tf.concat([[steps * games], tf.shape(states)[2:]], axis=0))
+        )
+        policy_loss, value_loss, entropy = compute_actor_critic_loss(
+            action_logits=action_logits,
+            value_estimates=value_estimates,
+            actions=actions,
+            rewards=rewards,
+            dones=dones,
+            bootstrap_values=bootstrap_values,
+            gamma=gamma,
+            config=self.loss_config,
+        )
+
+        games = tf.cast(games, tf.float32)
+        return policy_loss / games, value_loss / games, entropy / games
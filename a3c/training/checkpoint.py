@@ -0,0 +1,154 @@
+"""Resumable training checkpoints written in a background thread."""
+import os
+import pickle
+import queue
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from keras.optimizers import Optimizer
+
+from a3c.model.actor_critic_model import ActorCriticModel, initialize_model
+
+CHECKPOINT_PATTERN = re.compile(r"checkpoint_(\d+)\.pkl")
+WEIGHTS_PATTERN = re.compile(r"(\d+)_a3c\.keras")
+
+
+def find_latest_checkpoint(save_dir: Path) -> Optional[Path]:
+    """Return checkpoint with the highest episode in save_dir."""
+    checkpoints = _find_files(save_dir=save_dir, pattern=CHECKPOINT_PATTERN)
+    return checkpoints[-1] if checkpoints else None
+
+
+def load_checkpoint(
+    filepath: Path,
+    model: ActorCriticModel,
+    optimizer: Optimizer,
+    rng: Optional[np.random.Generator] = None,
+) -> dict:
+    """Restore model, optimizer and RNG states. Return checkpoint with episode and rewards.
+
+    State of rng is restored when checkpoint was saved with a generator.
+    """
+    with open(filepath, mode='rb') as file:
+        checkpoint = pickle.load(file)
+
+    model.set_weights(checkpoint["weights"])
+    # Optimizer creates its slot variables lazily, so they are built before restoring
+    optimizer.build(model.trainable_weights)
+    for variable, value in zip(optimizer.variables, checkpoint["optimizer"]):
+        variable.assign(value)
+    np.random.set_state(checkpoint["numpy_rng"])
+    random.setstate(checkpoint["python_rng"])
+    if rng is not None and checkpoint.get("game_rng") is not None:
+        rng.bit_generator.state = checkpoint["game_rng"]
+    return checkpoint
+
+
+def _find_files(save_dir: Path, pattern: re.Pattern) -> list[Path]:
+    """Return files matching pattern sorted by episode. Missing save_dir has no files."""
+    if not save_dir.is_dir():
+        return []
+    files = [path for path in save_dir.iterdir() if pattern.fullmatch(path.name)]
+    return sorted(files, key=lambda path: int(pattern.fullmatch(path.name).group(1)))
+
+
+class Checkpointer(threading.Thread):
+    """Save model weights and full training state without blocking training.
+
+    save copies the state on the caller's thread and the writer thread stores it. Files are
+    written to a temporary file and renamed, so an interrupted save never leaves a broken
+    checkpoint. Only keep_last newest checkpoints and weight files are kept, None keeps all.
+
+    Global NumPy and Python random states are saved with the generator given to save. Random
+    states inside process workers are not saved, so resumed process training is not reproducible.
+    """
+
+    def __init__(
+        self,
+        save_dir: Path,
+        model: ActorCriticModel,
+        optimizer: Optimizer,
+        observation: np.ndarray,
+        keep_last: Optional[int] = 3,
+    ):
+        super().__init__(daemon=True)
+        if keep_last is not None and keep_last < 1:
+            raise ValueError(f"keep_last must be at least 1, got {keep_last}.")
+        self.save_dir = save_dir
+        self.model = model
+        self.optimizer = optimizer
+        self.keep_last = keep_last
+        self.checkpoints: queue.Queue[Optional[dict]] = queue.Queue()
+        # Writer thread saves .keras weights with its own model copy
+        self.weights_model = initialize_model(
+            observation=observation, action_size=4, weights_path=None
+        )
+
+    def __enter__(self) -> "Checkpointer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Write pending checkpoints and stop writer thread."""
+        if self.is_alive():
+            self.checkpoints.put(None)
+            self.join()
+
+    def save(
+        self,
+        episode: int,
+        moving_average: list[float],
+        rng: Optional[np.random.Generator] = None,
+    ):
+        """Queue checkpoint of current training state.
+
+        Caller must prevent optimizer updates during the call to get a consistent state.
+        """
+        self.checkpoints.put(
+            {
+                "episode": episode,
+                "weights": self.model.get_weights(),
+                "optimizer": [variable.numpy() for variable in self.optimizer.variables],
+                "moving_average": list(moving_average),
+                "numpy_rng": np.random.get_state(),
+                "python_rng": random.getstate(),
+                "game_rng": rng.bit_generator.state if rng is not None else None,
+            }
+        )
+
+    def run(self) -> None:
+        """Write queued checkpoints until closed."""
+        checkpoint = self.checkpoints.get()
+        while checkpoint is not None:
+            self.write(checkpoint=checkpoint)
+            checkpoint = self.checkpoints.get()
+
+    def write(self, checkpoint: dict):
+        """Write weights and checkpoint files and remove old ones."""
+        episode = checkpoint["episode"]
+
+        self.weights_model.set_weights(checkpoint["weights"])
+        filepath = self.save_dir / f"{episode}_a3c.keras"
+        temp_filepath = self.save_dir / f"{episode}_a3c.tmp.keras"
+        self.weights_model.save_weights(str(temp_filepath))
+        os.replace(temp_filepath, filepath)
+
+        filepath = self.save_dir / f"checkpoint_{episode}.pkl"
+        temp_filepath = self.save_dir / f"checkpoint_{episode}.pkl.tmp"
+        with open(temp_filepath, mode='wb') as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filepath, filepath)
+
+        if self.keep_last is not None:
+            for pattern in (CHECKPOINT_PATTERN, WEIGHTS_PATTERN):
+                for old_filepath in _find_files(save_dir=self.save_dir, pattern=pattern)[
+                    : -self.keep_last
+                ]:
+                    old_filepath.unlink()
@@ -0,0 +1,102 @@
+"""Batched inference for A3C worker threads."""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from a3c.model.actor_critic_model import sample_seed
+
+
+class InferenceRequest:
+    """Observation waiting for action."""
+
+    __slots__ = ("state", "submitted", "done", "action")
+
+    def __init__(self, state: np.ndarray):
+        self.state = state
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.action: int = 0
+
+
+class InferenceServer(threading.Thread):
+    """Thread running the global model for batches of worker observations.
+
+    Batch is run when it has max_batch_size requests or when the oldest request has waited
+    max_latency seconds.
+    """
+
+    def __init__(self, act: Callable, max_batch_size: int, max_latency: float = 0.005):
+        super().__init__(daemon=True)
+        self.act = act
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.requests: queue.Queue[Optional[InferenceRequest]] = queue.Queue()
+
+        self.batches = 0
+        self.batch_sizes = np.zeros(shape=max_batch_size + 1, dtype=np.int64)
+        self.latencies = deque(maxlen=10000)
+
+    def submit(self, state: np.ndarray) -> int:
+        """Return sampled action for state. Blocks until batch is run."""
+        request = InferenceRequest(state=state)
+        self.requests.put(request)
+        request.done.wait()
+        return request.action
+
+    def stop(self):
+        """Stop server after pending requests are served."""
+        self.requests.put(None)
+        self.join()
+
+    def run(self) -> None:
+        """Serve requests until stopped."""
+        running = True
+        while running:
+            request = self.requests.get()
+            if request is None:
+                break
+
+            batch = [request]
+            deadline = request.submitted + self.max_latency
+            while len(batch) < self.max_batch_size:
+                try:
+                    request = self.requests.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    running = False
+                    break
+                batch.append(request)
+
+            self.run_batch(batch=batch)
+
+    def run_batch(self, batch: list[InferenceRequest]):
+        """Run model once for batch and wake up waiting workers."""
+        started = time.perf_counter()
+        actions, _ = self.act(np.stack([request.state for request in batch]), sample_seed())
+        actions = actions.numpy()
+
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+        for idx, request in enumerate(batch):
+            self.latencies.append(started - request.submitted)
+            request.action = int(actions[idx])
+            request.done.set()
+
+    def get_stats(self) -> dict:
+        """Return batch size and queue latency statistics."""
+        sizes = np.arange(self.batch_sizes.size)
+        requests = int(np.sum(self.batch_sizes * sizes))
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "requests": requests,
+            "batches": self.batches,
+            "batch_size_mean": requests / max(self.batches, 1),
+            "batch_size_max": int(sizes[self.batch_sizes > 0].max(initial=0)),
+            "queue_latency_ms_mean": float(latencies.mean()) if latencies.size else 0.0,
+            "queue_latency_ms_p90": float(np.percentile(latencies, 90)) if latencies.size else 0.0,
+        }
@@ -0,0 +1,120 @@
+"""Actor-critic loss shared by A3C workers and A2C trainer."""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+from keras.losses import huber
+
+eps = np.finfo(np.float32).eps.item()
+
+
+@dataclass
+class LossConfig:
+    """Loss terms of actor-critic training.
+
+    Without gae_lambda advantages are normalized discounted returns minus value estimates.
+    """
+
+    gae_lambda: Optional[float] = None
+    entropy_coef: float = 0.0
+    value_coef: float = 0.5
+
+
+def get_discounted_rewards(
+    rewards: tf.Tensor, dones: tf.Tensor, bootstrap_values: tf.Tensor, gamma: float
+) -> tf.Tensor:
+    """Calculate normalized discounted rewards of shape (steps, games).
+
+    Discounting restarts after finished games.
+    """
+    continues = 1.0 - tf.cast(dones, tf.float32)
+    # Start discounting from the final reward
+    discounted_rewards = tf.scan(
+        lambda discounted_sum, step: step[0] + gamma * step[1] * discounted_sum,
+        (tf.cast(rewards, tf.float32), continues),
+        initializer=tf.stop_gradient(tf.cast(bootstrap_values, tf.float32)),
+        reverse=True,
+    )
+
+    # Normalize
+    discounted_rewards = (discounted_rewards - tf.math.reduce_mean(discounted_rewards)) / (
+        tf.math.reduce_std(discounted_rewards) + eps
+    )
+
+    return discounted_rewards
+
+
+def get_gae_advantages(
+    rewards: tf.Tensor,
+    dones: tf.Tensor,
+    values: tf.Tensor,
+    bootstrap_values: tf.Tensor,
+    gamma: float,
+    gae_lambda: float,
+) -> tf.Tensor:
+    """Calculate GAE(lambda) advantages of shape (steps, games)."""
+    continues = 1.0 - tf.cast(dones, tf.float32)
+    bootstrap_values = tf.cast(bootstrap_values, tf.float32)
+    next_values = tf.concat([values[1:], tf.expand_dims(bootstrap_values, axis=0)], axis=0)
+    deltas = tf.cast(rewards, tf.float32) + gamma * continues * next_values - values
+
+    return tf.scan(
+        lambda advantage, step: step[0] + gamma * gae_lambda * step[1] * advantage,
+        (deltas, continues),
+        initializer=tf.zeros_like(bootstrap_values),
+        reverse=True,
+    )
+
+
+def compute_actor_critic_loss(
+    action_logits: tf.Tensor,
+    value_estimates: tf.Tensor,
+    actions: tf.Tensor,
+    rewards: tf.Tensor,
+    dones: tf.Tensor,
+    bootstrap_values: tf.Tensor,
+    gamma: float,
+    config: LossConfig,
+) -> (tf.Tensor, tf.Tensor, tf.Tensor):
+    """Return policy loss, value loss and policy entropy summed over rollout.
+
+    Rollout tensors have shape (steps, games), model outputs are flattened in the same order.
+    """
+    if config.gae_lambda is None:
+        returns = tf.reshape(
+            get_discounted_rewards(
+                rewards=rewards, dones=dones, bootstrap_values=bootstrap_values, gamma=gamma
+            ),
+            (-1, 1),
+        )
+        advantage = returns - value_estimates
+    else:
+        values = tf.stop_gradient(tf.reshape(value_estimates, tf.shape(rewards)))
+        advantage = get_gae_advantages(
+            rewards=rewards,
+            dones=dones,
+            values=values,
+            bootstrap_values=bootstrap_values,
+            gamma=gamma,
+            gae_lambda=config.gae_lambda,
+        )
+        returns = tf.reshape(advantage + values, (-1, 1))
+        advantage = tf.reshape(advantage, (-1, 1))
+
+    value_loss = tf.reduce_sum(huber(returns, value_estimates))
+
+    action_probabilities = tf.nn.softmax(action_logits)
+    action_probs = tf.gather(action_probabilities, tf.reshape(actions, (-1, 1)), batch_dims=1)
+    log_probabilities = -tf.math.log(action_probs)
+    policy_loss = tf.reduce_sum(log_probabilities * tf.stop_gradient(advantage))
+
+    entropy = -tf.reduce_sum(action_probabilities * tf.nn.log_softmax(action_logits))
+    return policy_loss, value_loss, entropy
+
+
+def get_total_loss(
+    policy_loss: tf.Tensor, value_loss: tf.Tensor, entropy: tf.Tensor, config: LossConfig
+) -> tf.Tensor:
+    """Combine loss terms. Entropy bonus encourages exploration."""
+    return policy_loss + config.value_coef * value_loss - config.entropy_coef * entropy
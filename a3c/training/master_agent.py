@@ -1,34 +1,102 @@
 """Master worker for Snake A3C."""
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+import tensorflow as tf
 from keras.optimizers import Adam
 
+from game.data_structures import ObservationMode
 from game.rl_game import RLGame
 from game.snake import Snake
-from a3c.model.actor_critic_model import initialize_model
-from a3c.training.worker import Worker
+from a3c.model.actor_critic_model import create_act_function, initialize_model
+from a3c.training.checkpoint import Checkpointer, find_latest_checkpoint, load_checkpoint
+from a3c.training.inference_server import InferenceServer
+from a3c.training.losses import LossConfig
+from a3c.training.parameter_sync import ParameterSync
+from a3c.training.process_worker import WorkerMessage, run_process_worker
+from a3c.training.shared_memory import SharedTensors
+from a3c.training.support import LogFormat, TrainingLogger
+from a3c.training.worker import Worker, restore_progress
+
+
+@dataclass
+class TrainingBackend:
+    """Available ways to run workers."""
+
+    THREAD = "thread"
+    PROCESS = "process"
 
 
 class MasterAgent:
     """Master agent class controlling workers."""
 
     def __init__(
-        self, save_dir: Path, grid_size: int, max_episodes: int, weights_path: Optional[Path] = None
+        self,
+        save_dir: Path,
+        grid_size: int,
+        max_episodes: int,
+        weights_path: Optional[Path] = None,
+        observation_mode: str = ObservationMode.PIXELS,
+        observation_dtype: Optional[str] = None,
+        body_age: bool = False,
+        loss_config: Optional[LossConfig] = None,
+        run_eagerly: bool = False,
+        jit_compile: bool = False,
+        resume: bool = False,
+        keep_checkpoints: Optional[int] = 3,
     ):
         self.save_dir = save_dir
         self.grid_size = grid_size
         self.weights_path = weights_path
         self.max_episodes = max_episodes
+        self.observation_mode = observation_mode
+        self.observation_dtype = observation_dtype
+        self.body_age = body_age
+        self.loss_config = loss_config or LossConfig()
+        self.run_eagerly = run_eagerly
+        self.jit_compile = jit_compile
+        self.keep_checkpoints = keep_checkpoints
         self.global_episode: int = 0
+        self.moving_average: list[float] = []
+        tf.config.run_functions_eagerly(run_eagerly)
 
         snake = Snake()
-        env = RLGame(grid_size=self.grid_size, snake=snake)
+        env = RLGame(
+            grid_size=self.grid_size,
+            snake=snake,
+            observation_mode=observation_mode,
+            observation_dtype=observation_dtype,
+            body_age=body_age,
+        )
 
+        self.observation = env.get_observation().copy()
         self.global_model = initialize_model(
-            observation=env.get_observation(), action_size=4, weights_path=weights_path
+            observation=self.observation, action_size=4, weights_path=weights_path
         )
         self.optimizer = Adam(learning_rate=0.0001)
+        self.parameter_sync = ParameterSync(
+            global_model=self.global_model, optimizer=self.optimizer
+        )
+        if resume:
+            self.resume()
+
+    def resume(self):
+        """Continue from the latest checkpoint in save_dir."""
+        filepath = find_latest_checkpoint(save_dir=self.save_dir)
+        if filepath is None:
+            print(f"No checkpoint found in {self.save_dir}, starting new training.")
+            return
+        checkpoint = load_checkpoint(
+            filepath=filepath, model=self.global_model, optimizer=self.optimizer
+        )
+        self.global_episode = checkpoint["episode"] + 1
+        self.moving_average = checkpoint["moving_average"]
+        print(f"Resuming training from episode {self.global_episode}.")
 
     def train(
         self,
@@ -38,8 +106,84 @@ class MasterAgent:
         update_freq: int,
         weights_save_freq: int,
         number_of_workers: int = 1,
+        backend: str = TrainingBackend.THREAD,
+        inference_server: bool = False,
+        inference_batch_size: Optional[int] = None,
+        inference_latency: float = 0.005,
+        log_format: str = LogFormat.CSV,
     ):
-        """Do asynchronous training with workers."""
+        """Do asynchronous training with workers.
+
+        With inference_server thread workers share one batched global model instead of local models.
+        """
+        if inference_server and backend != TrainingBackend.THREAD:
+            raise ValueError("Inference server is supported only with thread backend.")
+        if backend not in (TrainingBackend.THREAD, TrainingBackend.PROCESS):
+            raise ValueError(f"Unknown training backend: {backend}")
+
+        # Logger and checkpointer are flushed also when training is interrupted
+        with TrainingLogger(
+            filepath=save_dir / 'training_log.csv', log_format=log_format
+        ) as logger, Checkpointer(
+            save_dir=save_dir,
+            model=self.global_model,
+            optimizer=self.optimizer,
+            observation=self.observation,
+            keep_last=self.keep_checkpoints,
+        ) as checkpointer:
+            if backend == TrainingBackend.PROCESS:
+                self._train_with_processes(
+                    number_of_workers=number_of_workers,
+                    save_dir=save_dir,
+                    gamma=gamma,
+                    max_episodes=max_episodes,
+                    update_freq=update_freq,
+                    weights_save_freq=weights_save_freq,
+                    logger=logger,
+                    checkpointer=checkpointer,
+                )
+            else:
+                self._train_with_threads(
+                    number_of_workers=number_of_workers,
+                    save_dir=save_dir,
+                    gamma=gamma,
+                    max_episodes=max_episodes,
+                    update_freq=update_freq,
+                    weights_save_freq=weights_save_freq,
+                    logger=logger,
+                    checkpointer=checkpointer,
+                    inference_server=inference_server,
+                    inference_batch_size=inference_batch_size,
+                    inference_latency=inference_latency,
+                )
+
+    def _train_with_threads(
+        self,
+        number_of_workers: int,
+        save_dir: Path,
+        gamma: float,
+        max_episodes: int,
+        update_freq: int,
+        weights_save_freq: int,
+        logger: TrainingLogger,
+        checkpointer: Checkpointer,
+        inference_server: bool,
+        inference_batch_size: Optional[int],
+        inference_latency: float,
+    ):
+        """Run workers in threads sharing the global model."""
+        restore_progress(episode=self.global_episode, rewards=self.moving_average)
+        server = None
+        if inference_server:
+            act = create_act_function(
+                model=self.global_model, observation=self.observation, jit_compile=self.jit_compile
+            )
+            server = InferenceServer(
+                act=act,
+                max_batch_size=inference_batch_size or number_of_workers,
+                max_latency=inference_latency,
+            )
+            server.start()
 
         workers = self._initialize_workers(
             number_of_workers=number_of_workers,
@@ -48,6 +192,9 @@ class MasterAgent:
             max_episodes=max_episodes,
             update_freq=update_freq,
             weights_save_freq=weights_save_freq,
+            logger=logger,
+            checkpointer=checkpointer,
+            inference_server=server,
         )
         print("Starting training!")
         for worker in workers:
@@ -56,6 +203,27 @@ class MasterAgent:
         for worker in workers:
             worker.join()
 
+        for worker_idx, stats in sorted(self.parameter_sync.stats.items()):
+            stats = stats.as_dict()
+            print(
+                f"worker: {worker_idx}, "
+                f"updates: {stats['updates']}, "
+                f"syncs: {stats['syncs']}, "
+                f"sync time: {stats['sync_time_ms_mean']:.2f} ms, "
+                f"staleness: {stats['staleness_mean']:.2f} (max {stats['staleness_max']})"
+            )
+
+        if server is not None:
+            server.stop()
+            stats = server.get_stats()
+            print(
+                f"inference requests: {stats['requests']}, "
+                f"batches: {stats['batches']}, "
+                f"batch size: {stats['batch_size_mean']:.2f} (max {stats['batch_size_max']}), "
+                f"queue latency: {stats['queue_latency_ms_mean']:.2f} ms "
+                f"(p90 {stats['queue_latency_ms_p90']:.2f} ms)"
+            )
+
     def _initialize_workers(
         self,
         number_of_workers: int,
@@ -64,6 +232,9 @@ class MasterAgent:
         max_episodes: int,
         update_freq: int,
         weights_save_freq: int,
+        logger: TrainingLogger,
+        checkpointer: Checkpointer,
+        inference_server: Optional[InferenceServer] = None,
     ) -> list[Worker]:
         """Initialize workers."""
         workers = []
@@ -72,15 +243,116 @@ class MasterAgent:
             worker = Worker(
                 save_dir=save_dir,
                 global_model=self.global_model,
-                optimizer=self.optimizer,
+                parameter_sync=self.parameter_sync,
                 worker_index=i,
                 grid_size=self.grid_size,
                 weights_path=self.weights_path,
+                observation_mode=self.observation_mode,
+                observation_dtype=self.observation_dtype,
+                body_age=self.body_age,
                 global_episode=self.global_episode,
                 gamma=gamma,
                 update_freq=update_freq,
                 max_episodes=max_episodes,
                 weights_save_freq=weights_save_freq,
+                jit_compile=self.jit_compile,
+                logger=logger,
+                checkpointer=checkpointer,
+                loss_config=self.loss_config,
+                inference_server=inference_server,
             )
             workers.append(worker)
         return workers
+
+    def _train_with_processes(
+        self,
+        number_of_workers: int,
+        save_dir: Path,
+        gamma: float,
+        max_episodes: int,
+        update_freq: int,
+        weights_save_freq: int,
+        logger: TrainingLogger,
+        checkpointer: Checkpointer,
+    ):
+        """Run workers in separate processes and apply their gradients to the global model."""
+        # Tensorflow is not fork safe, so processes are spawned
+        context = multiprocessing.get_context("spawn")
+        shapes = [weight.shape for weight in self.global_model.get_weights()]
+        gradient_shapes = [weight.shape for weight in self.global_model.trainable_weights]
+        parameters = SharedTensors(shapes=shapes, context=context)
+        parameters.write(arrays=self.global_model.get_weights())
+        episode_counter = context.Value("i", self.global_episode)
+
+        processes = []
+        connections = {}
+        for i in range(number_of_workers):
+            print(f"Initializing {i}. worker")
+            gradients = SharedTensors(shapes=gradient_shapes, context=context)
+            master_connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=run_process_worker,
+                kwargs=dict(
+                    save_dir=save_dir,
+                    worker_index=i,
+                    grid_size=self.grid_size,
+                    observation_mode=self.observation_mode,
+                    observation_dtype=self.observation_dtype,
+                    body_age=self.body_age,
+                    gamma=gamma,
+                    update_freq=update_freq,
+                    weights_save_freq=weights_save_freq,
+                    max_episodes=max_episodes,
+                    episode_counter=episode_counter,
+                    parameters=parameters,
+                    gradients=gradients,
+                    connection=worker_connection,
+                    loss_config=self.loss_config,
+                    run_eagerly=self.run_eagerly,
+                    jit_compile=self.jit_compile,
+                ),
+            )
+            processes.append(process)
+            connections[master_connection] = (i, gradients)
+
+        print("Starting training!")
+        for process in processes:
+            process.start()
+
+        moving_average = deque(self.moving_average, maxlen=100)
+        while connections:
+            for connection in wait(list(connections)):
+                worker_idx, gradients = connections[connection]
+                try:
+                    message, info = connection.recv()
+                except EOFError:
+                    # Worker process exited without finishing
+                    message = WorkerMessage.finished
+
+                if message == WorkerMessage.gradients:
+                    self.optimizer.apply_gradients(
+                        zip(gradients.read(), self.global_model.trainable_weights)
+                    )
+                    parameters.write(arrays=self.global_model.get_weights())
+                    connection.send(None)
+                elif message == WorkerMessage.episode:
+                    moving_average.append(info["reward"])
+                    logger.log_progress(
+                        worker_idx=worker_idx,
+                        global_episode=info["episode"],
+                        reward=info["reward"],
+                        reward_moving_average=float(np.mean(moving_average)),
+                        steps=info["steps"],
+                        policy_loss=info["policy_loss"],
+                        value_loss=info["value_loss"],
+                        steps_per_sec=info["steps"] / info["duration"],
+                        update_latency=info["update_latency"],
+                    )
+                    episode = info["episode"]
+                    if episode % weights_save_freq == 0 and episode != 0:
+                        checkpointer.save(episode=episode, moving_average=moving_average)
+                else:
+                    del connections[connection]
+
+        for process in processes:
+            process.join()
@@ -0,0 +1,72 @@
+"""Versioned parameter synchronization between global and worker models."""
+import threading
+import time
+from dataclasses import dataclass
+
+import tensorflow as tf
+from keras.optimizers import Optimizer
+
+from a3c.model.actor_critic_model import ActorCriticModel
+
+
+@dataclass
+class SyncStats:
+    """Parameter sync metrics of one worker."""
+
+    updates: int = 0
+    syncs: int = 0
+    sync_time: float = 0.0
+    staleness_sum: int = 0
+    staleness_max: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "updates": self.updates,
+            "syncs": self.syncs,
+            "sync_time_ms_mean": 1000 * self.sync_time / max(self.syncs, 1),
+            "staleness_mean": self.staleness_sum / max(self.updates, 1),
+            "staleness_max": self.staleness_max,
+        }
+
+
+class ParameterSync:
+    """Apply worker gradients to global model and copy changed parameters to workers.
+
+    Every optimizer step increases version. Workers remember version of their parameters, so
+    staleness of gradients is known.
+    """
+
+    def __init__(self, global_model: ActorCriticModel, optimizer: Optimizer):
+        self.global_model = global_model
+        self.optimizer = optimizer
+        self.version = 0
+        self.lock = threading.Lock()
+        self.stats: dict[int, SyncStats] = {}
+
+    def apply_gradients(self, worker_idx: int, gradients: list[tf.Tensor], version: int) -> int:
+        """Apply gradients computed with parameters of given version and return new version."""
+        stats = self.stats.setdefault(worker_idx, SyncStats())
+        with self.lock:
+            staleness = self.version - version
+            self.optimizer.apply_gradients(zip(gradients, self.global_model.trainable_weights))
+            self.version += 1
+            version = self.version
+
+        stats.updates += 1
+        stats.staleness_sum += staleness
+        stats.staleness_max = max(stats.staleness_max, staleness)
+        return version
+
+    def sync(self, worker_idx: int, model: ActorCriticModel) -> int:
+        """Copy global parameters to model and return version of model."""
+        stats = self.stats.setdefault(worker_idx, SyncStats())
+        with self.lock:
+            started = time.perf_counter()
+            for variable, global_variable in zip(model.weights, self.global_model.weights):
+                variable.assign(global_variable)
+            version = self.version
+            sync_time = time.perf_counter() - started
+
+        stats.syncs += 1
+        stats.sync_time += sync_time
+        return version
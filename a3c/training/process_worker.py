@@ -0,0 +1,125 @@
+"""A3C worker running in its own process."""
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Optional
+
+import tensorflow as tf
+
+from a3c.training.losses import LossConfig
+from a3c.training.shared_memory import SharedTensors
+from a3c.training.worker import WorkerBase
+
+
+@dataclass
+class WorkerMessage:
+    """Messages sent from process workers to master agent."""
+
+    gradients = "gradients"
+    episode = "episode"
+    finished = "finished"
+
+
+class ProcessWorker(WorkerBase):
+    """Worker used for asynchronous training in a separate process.
+
+    Gradients are written to the worker's shared buffer and applied by the master agent, which
+    then publishes the new global parameters to the shared parameter buffer.
+    """
+
+    def __init__(
+        self,
+        save_dir: Path,
+        worker_index: int,
+        grid_size: int,
+        observation_mode: str,
+        observation_dtype: Optional[str],
+        body_age: bool,
+        gamma: float,
+        update_freq: int,
+        weights_save_freq: int,
+        max_episodes: int,
+        episode_counter,
+        parameters: SharedTensors,
+        gradients: SharedTensors,
+        connection: Connection,
+        loss_config: Optional[LossConfig] = None,
+        run_eagerly: bool = False,
+        jit_compile: bool = False,
+    ):
+        super().__init__(
+            save_dir=save_dir,
+            worker_index=worker_index,
+            grid_size=grid_size,
+            observation_mode=observation_mode,
+            observation_dtype=observation_dtype,
+            body_age=body_age,
+            gamma=gamma,
+            update_freq=update_freq,
+            weights_save_freq=weights_save_freq,
+            max_episodes=max_episodes,
+            loss_config=loss_config,
+            run_eagerly=run_eagerly,
+            jit_compile=jit_compile,
+        )
+        self.episode_counter = episode_counter
+        self.parameters = parameters
+        self.gradients = gradients
+        self.connection = connection
+
+    def run(self) -> None:
+        """Start worker. Called in the worker process."""
+        # Workers run side by side, so each of them uses one core
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        tf.config.run_functions_eagerly(self.run_eagerly)
+        self.build()
+        self.sync_parameters()
+        self.train()
+        self.connection.send((WorkerMessage.finished, None))
+        self.connection.close()
+
+    def sync_parameters(self):
+        """Copy latest global parameters to local model."""
+        self.local_model.set_weights(self.parameters.read())
+
+    def claim_episode(self) -> Optional[int]:
+        with self.episode_counter.get_lock():
+            if self.episode_counter.value >= self.max_episodes:
+                return None
+            episode = self.episode_counter.value
+            self.episode_counter.value += 1
+        return episode
+
+    def update_global_model(self, gradients: list[tf.Tensor]):
+        self.gradients.write(arrays=[gradient.numpy() for gradient in gradients])
+        self.connection.send((WorkerMessage.gradients, None))
+        # Master agent answers after new parameters are published
+        self.connection.recv()
+        self.sync_parameters()
+
+    def finish_episode(
+        self,
+        episode: int,
+        reward: float,
+        steps: int,
+        policy_loss: float,
+        value_loss: float,
+        duration: float,
+        update_latency: float,
+    ):
+        info = {
+            "episode": episode,
+            "reward": reward,
+            "steps": steps,
+            "policy_loss": policy_loss,
+            "value_loss": value_loss,
+            "duration": duration,
+            "update_latency": update_latency,
+        }
+        self.connection.send((WorkerMessage.episode, info))
+
+
+def run_process_worker(**worker_options):
+    """Entry point of worker process."""
+    ProcessWorker(**worker_options).run()
@@ -0,0 +1,69 @@
+"""Compact rollout storage for A3C workers."""
+import numpy as np
+import numpy.typing as npt
+
+
+class RolloutBuffer:
+    """Preallocated buffer storing every frame of a rollout once.
+
+    Consecutive observations share all but their newest frame, so only the first observation of
+    a rollout is stored as a full stack. Frames with values k / 255 (pixels and binary grids) are
+    stored as uint8 and converted back to the observation dtype when states are read.
+    """
+
+    def __init__(self, capacity: int, observation: np.ndarray, compact: bool = True):
+        self.capacity = capacity
+        self.frame_stack = observation.shape[0]
+        self.observation_dtype = observation.dtype
+        self.scaled = compact and not np.issubdtype(observation.dtype, np.integer)
+        storage_dtype = np.uint8 if compact else observation.dtype
+
+        self.frames = np.zeros(
+            shape=(capacity + self.frame_stack - 1, *observation.shape[1:]), dtype=storage_dtype
+        )
+        self.actions = np.zeros(shape=capacity, dtype=np.int32)
+        self.rewards = np.zeros(shape=capacity, dtype=np.float32)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the buffer arrays."""
+        return self.frames.nbytes + self.actions.nbytes + self.rewards.nbytes
+
+    def clear(self):
+        self.size = 0
+
+    def store(self, state: np.ndarray, action: int, reward: float):
+        """Store transition. State must follow the previous stored state in the same episode."""
+        if self.size == self.capacity:
+            raise IndexError(f"Rollout buffer is full ({self.capacity} steps).")
+        if self.size == 0:
+            self.frames[: self.frame_stack] = self._encode(frames=state)
+        else:
+            self.frames[self.size + self.frame_stack - 1] = self._encode(frames=state[-1])
+        self.actions[self.size] = action
+        self.rewards[self.size] = reward
+        self.size += 1
+
+    def get_states(self) -> npt.NDArray:
+        """Return stored states stacked to shape (size, frame_stack, ...)."""
+        idx = np.arange(self.size)[:, None] + np.arange(self.frame_stack)
+        states = self.frames[idx]
+        if self.scaled:
+            return np.divide(states, 255, dtype=self.observation_dtype)
+        return states
+
+    def get_actions(self) -> npt.NDArray:
+        return self.actions[: self.size]
+
+    def get_rewards(self) -> npt.NDArray:
+        return self.rewards[: self.size]
+
+    def _encode(self, frames: np.ndarray) -> np.ndarray:
+        """Convert frames to storage dtype."""
+        if self.scaled:
+            return np.rint(frames * 255)
+        return frames
@@ -0,0 +1,35 @@
+"""Shared memory buffers for exchanging model tensors between processes."""
+from multiprocessing.context import BaseContext
+
+import numpy as np
+
+
+class SharedTensors:
+    """List of float32 tensors stored in one flat shared memory buffer."""
+
+    def __init__(self, shapes: list[tuple], context: BaseContext):
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.sizes = [int(np.prod(shape)) for shape in self.shapes]
+        self.buffer = context.RawArray("f", sum(self.sizes))
+        self.lock = context.Lock()
+
+    def write(self, arrays: list[np.ndarray]):
+        """Copy arrays to shared buffer."""
+        flat = np.frombuffer(self.buffer, dtype=np.float32)
+        with self.lock:
+            offset = 0
+            for array, size in zip(arrays, self.sizes):
+                flat[offset : offset + size] = np.ravel(array)
+                offset += size
+
+    def read(self) -> list[np.ndarray]:
+        """Return copies of tensors in shared buffer."""
+        flat = np.frombuffer(self.buffer, dtype=np.float32)
+        with self.lock:
+            flat = flat.copy()
+        arrays = []
+        offset = 0
+        for shape, size in zip(self.shapes, self.sizes):
+            arrays.append(flat[offset : offset + size].reshape(shape))
+            offset += size
+        return arrays
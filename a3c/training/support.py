@@ -1,46 +1,138 @@
 """Support module for logging."""
 
-from pathlib import Path
 import csv
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Column names of .npz logs and matching .csv headers
+LOG_FIELDS = {
+    'episode': 'Episode',
+    'reward': 'Reward',
+    'steps': 'Steps',
+    'policy_loss': 'Policy Loss',
+    'value_loss': 'Value Loss',
+    'moving_average': 'Moving Average',
+    'worker_idx': 'Worker Idx',
+    'steps_per_sec': 'Steps/sec',
+    'update_latency_ms': 'Update Latency (ms)',
+    'logger_queue_depth': 'Logger Queue Depth',
+}
+
+
+@dataclass
+class LogFormat:
+    """Available training log formats."""
+
+    CSV = "csv"
+    NPZ = "npz"
 
 
 def create_log_file(filepath: Path) -> None:
     """Create .csv file to record training progress"""
     with open(filepath, mode='w', newline='') as file:
-        fieldnames = [
-            'Episode',
-            'Reward',
-            'Steps',
-            'Policy Loss',
-            'Value Loss',
-            'Moving Average',
-            'Worker Idx',
-        ]
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer = csv.DictWriter(file, fieldnames=list(LOG_FIELDS.values()))
         writer.writeheader()
     return
 
 
-def log_progress(
-    worker_idx: int,
-    global_episode: int,
-    reward: int,
-    reward_moving_average: float,
-    steps: int,
-    policy_loss: float,
-    value_loss: float,
-    filepath: Path,
-    print_out: bool = True,
-) -> None:
-    """Log training progress."""
+def rotate_old_log_file(filepath: Path) -> Optional[Path]:
+    """Rename .csv log with a different header, so rows are not appended under wrong columns.
 
+    Return new path of the renamed file.
+    """
     if not filepath.exists():
-        create_log_file(filepath=filepath)
+        return None
+    with open(filepath, newline='') as file:
+        header = next(csv.reader(file), None)
+    if header == list(LOG_FIELDS.values()):
+        return None
+
+    idx = 1
+    old_filepath = filepath.with_name(f"{filepath.stem}.{idx}{filepath.suffix}")
+    while old_filepath.exists():
+        idx += 1
+        old_filepath = filepath.with_name(f"{filepath.stem}.{idx}{filepath.suffix}")
+    filepath.rename(old_filepath)
+    return old_filepath
+
+
+def load_npz_log(filepath: Path) -> dict[str, np.ndarray]:
+    """Concatenate .npz chunks written for filepath."""
+    chunks = sorted(filepath.parent.glob(f"{filepath.stem}_*.npz"))
+    columns = {field: [] for field in LOG_FIELDS}
+    for chunk in chunks:
+        with np.load(chunk) as data:
+            for field in LOG_FIELDS:
+                columns[field].append(data[field])
+    return {field: np.concatenate(values) for field, values in columns.items() if values}
+
 
-    with open(filepath, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(
-            [
+class TrainingLogger(threading.Thread):
+    """Training progress logger writing rows in a background thread.
+
+    Workers only put rows to a queue. Writer thread appends them in batches of flush_size rows
+    or every flush_interval seconds. Logger queue depth column is the number of rows waiting in
+    this queue. Existing .csv log with different columns is renamed before writing. Use as context
+    manager to flush on shutdown and Ctrl-C.
+    """
+
+    def __init__(
+        self,
+        filepath: Path,
+        log_format: str = LogFormat.CSV,
+        print_out: bool = True,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+    ):
+        super().__init__(daemon=True)
+        if log_format not in (LogFormat.CSV, LogFormat.NPZ):
+            raise ValueError(f"Unknown log format: {log_format}")
+        self.filepath = filepath
+        self.log_format = log_format
+        self.print_out = print_out
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.rows: queue.Queue[Optional[tuple]] = queue.Queue()
+        self.chunk_idx = len(list(filepath.parent.glob(f"{filepath.stem}_*.npz")))
+        if log_format == LogFormat.CSV:
+            old_filepath = rotate_old_log_file(filepath=filepath)
+            if old_filepath is not None:
+                print(f"Log header of {filepath} has changed, old log moved to {old_filepath}.")
+
+    def __enter__(self) -> "TrainingLogger":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Write remaining rows and stop writer thread."""
+        if self.is_alive():
+            self.rows.put(None)
+            self.join()
+
+    def log_progress(
+        self,
+        worker_idx: int,
+        global_episode: int,
+        reward: float,
+        reward_moving_average: float,
+        steps: int,
+        policy_loss: float,
+        value_loss: float,
+        steps_per_sec: float = 0.0,
+        update_latency: float = 0.0,
+    ) -> None:
+        """Queue training progress of one episode. Update latency is given in seconds."""
+        self.rows.put(
+            (
                 global_episode,
                 reward,
                 steps,
@@ -48,13 +140,55 @@ def log_progress(
                 value_loss,
                 reward_moving_average,
                 worker_idx,
-            ]
+                steps_per_sec,
+                update_latency * 1000,
+                self.rows.qsize(),
+            )
         )
 
-    if print_out:
-        print(
-            f"episode: {global_episode}, "
-            f"reward: {reward}, "
-            f"steps: {steps}, "
-            f"moving_average: {reward_moving_average:.3f}"
-        )
+    def run(self) -> None:
+        """Write queued rows until closed."""
+        rows = []
+        running = True
+        deadline = time.monotonic() + self.flush_interval
+        while running:
+            try:
+                row = self.rows.get(timeout=max(deadline - time.monotonic(), 0))
+                if row is None:
+                    running = False
+                else:
+                    rows.append(row)
+            except queue.Empty:
+                pass
+
+            if rows and (
+                not running or len(rows) >= self.flush_size or time.monotonic() >= deadline
+            ):
+                self.write(rows=rows)
+                rows = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def write(self, rows: list[tuple]):
+        """Write batch of rows and print them."""
+        if self.log_format == LogFormat.NPZ:
+            columns = zip(*rows)
+            filepath = self.filepath.parent / f"{self.filepath.stem}_{self.chunk_idx:05d}.npz"
+            np.savez(filepath, **dict(zip(LOG_FIELDS, map(np.array, columns))))
+            self.chunk_idx += 1
+        else:
+            if not self.filepath.exists():
+                create_log_file(filepath=self.filepath)
+            with open(self.filepath, mode='a', newline='') as file:
+                csv.writer(file).writerows(rows)
+
+        if self.print_out:
+            print(
+                "\n".join(
+                    f"episode: {row[0]}, "
+                    f"reward: {row[1]}, "
+                    f"steps: {row[2]}, "
+                    f"moving_average: {row[5]:.3f}"
+                    for row in rows
+                )
+            )
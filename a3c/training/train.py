@@ -12,7 +12,11 @@ sys.path.append(os.getcwd())
 import argparse
 from pathlib import Path
 
-from a3c.training.master_agent import MasterAgent
+from game.data_structures import ObservationMode
+from a3c.training.a2c_trainer import A2CTrainer
+from a3c.training.losses import LossConfig
+from a3c.training.master_agent import MasterAgent, TrainingBackend
+from a3c.training.support import LogFormat
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -24,12 +28,92 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--weights_path", type=Path, default=None, help="Path to model weights (.keras)"
     )
+    parser.add_argument(
+        "--observation_mode",
+        type=str,
+        default=ObservationMode.PIXELS,
+        choices=[ObservationMode.PIXELS, ObservationMode.GRID],
+        help="Render observations as pixels or as compact grid tensors.",
+    )
+    parser.add_argument(
+        "--observation_dtype",
+        type=str,
+        default=None,
+        choices=["uint8", "float16", "float32", "float64"],
+        help="Data type of observation frames. Defaults to float64 pixels and float32 grids.",
+    )
+    parser.add_argument(
+        "--body_age", action="store_true", help="Add body age channel to grid observations."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue training from the latest checkpoint in save_dir.",
+    )
+    parser.add_argument(
+        "--keep_checkpoints",
+        type=int,
+        default=3,
+        help="How many newest checkpoints and weight files are kept, at least 1.",
+    )
+    parser.add_argument(
+        "--run_eagerly",
+        action="store_true",
+        help="Run compiled acting and training steps eagerly for debugging.",
+    )
+    parser.add_argument(
+        "--jit_compile", action="store_true", help="Compile acting and training steps with XLA."
+    )
     parser.add_argument(
         "--number_of_workers",
         type=int,
         default=8,
         help="Specify how many workers are utilized in training.",
     )
+    parser.add_argument(
+        "--algorithm",
+        type=str,
+        default="a3c",
+        choices=["a3c", "a2c"],
+        help="Train asynchronously with workers or synchronously with vectorized games.",
+    )
+    parser.add_argument(
+        "--number_of_games",
+        type=int,
+        default=16,
+        help="Specify how many games are played in lockstep in A2C training.",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default=TrainingBackend.THREAD,
+        choices=[TrainingBackend.THREAD, TrainingBackend.PROCESS],
+        help="Run workers as threads or as separate processes.",
+    )
+    parser.add_argument(
+        "--inference_server",
+        action="store_true",
+        help="Run batched inference for thread workers with the global model.",
+    )
+    parser.add_argument(
+        "--inference_batch_size",
+        type=int,
+        default=None,
+        help="Maximum inference batch size. Defaults to number of workers.",
+    )
+    parser.add_argument(
+        "--inference_latency_ms",
+        type=float,
+        default=5.0,
+        help="How long inference server waits to fill a batch.",
+    )
+    parser.add_argument(
+        "--log_format",
+        type=str,
+        default=LogFormat.CSV,
+        choices=[LogFormat.CSV, LogFormat.NPZ],
+        help="Write training log as .csv file or as .npz column chunks.",
+    )
     parser.add_argument(
         "--max_episodes", type=int, default=15000, help="How many episodes training is running."
     )
@@ -39,6 +123,21 @@ def parse_arguments() -> argparse.Namespace:
         default=0.99,
         help="Coefficient to control effect of long/short term reward on learning.",
     )
+    parser.add_argument(
+        "--gae_lambda",
+        type=float,
+        default=None,
+        help="Use GAE(lambda) advantages. By default advantages use normalized discounted rewards.",
+    )
+    parser.add_argument(
+        "--entropy_coef",
+        type=float,
+        default=0.0,
+        help="Weight of policy entropy bonus in the loss.",
+    )
+    parser.add_argument(
+        "--value_coef", type=float, default=0.5, help="Weight of value loss in the loss."
+    )
     parser.add_argument(
         "--update_freq",
         type=float,
@@ -54,13 +153,58 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def get_loss_config(args: argparse.Namespace) -> LossConfig:
+    return LossConfig(
+        gae_lambda=args.gae_lambda, entropy_coef=args.entropy_coef, value_coef=args.value_coef
+    )
+
+
+def train_a2c(args: argparse.Namespace):
+    """Train with synchronous A2C. Vectorized games support only pixel observations."""
+    if args.observation_mode != ObservationMode.PIXELS or args.body_age:
+        raise ValueError("A2C training supports only pixel observations.")
+
+    trainer = A2CTrainer(
+        save_dir=args.save_dir,
+        grid_size=args.grid_size,
+        number_of_games=args.number_of_games,
+        weights_path=args.weights_path,
+        observation_dtype=args.observation_dtype,
+        run_eagerly=args.run_eagerly,
+        jit_compile=args.jit_compile,
+        resume=args.resume,
+        keep_checkpoints=args.keep_checkpoints,
+        loss_config=get_loss_config(args=args),
+    )
+    trainer.train(
+        gamma=args.gamma,
+        max_episodes=args.max_episodes,
+        update_freq=args.update_freq,
+        weights_save_freq=args.weights_save_freq,
+        log_format=args.log_format,
+    )
+
+
 def main():
     args = parse_arguments()
+    args.save_dir.mkdir(parents=True, exist_ok=True)
+    if args.algorithm == "a2c":
+        train_a2c(args=args)
+        return
+
     master_agent = MasterAgent(
         save_dir=args.save_dir,
         grid_size=args.grid_size,
         weights_path=args.weights_path,
         max_episodes=args.max_episodes,
+        observation_mode=args.observation_mode,
+        observation_dtype=args.observation_dtype,
+        body_age=args.body_age,
+        run_eagerly=args.run_eagerly,
+        jit_compile=args.jit_compile,
+        resume=args.resume,
+        keep_checkpoints=args.keep_checkpoints,
+        loss_config=get_loss_config(args=args),
     )
 
     master_agent.train(
@@ -70,6 +214,11 @@ def main():
         weights_save_freq=args.weights_save_freq,
         max_episodes=args.max_episodes,
         number_of_workers=args.number_of_workers,
+        backend=args.backend,
+        inference_server=args.inference_server,
+        inference_batch_size=args.inference_batch_size,
+        inference_latency=args.inference_latency_ms / 1000,
+        log_format=args.log_format,
     )
 
 
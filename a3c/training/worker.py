@@ -1,89 +1,157 @@
 """Implementation for A3C Worker."""
 
 import threading
+import time
+from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Callable, Optional
 from collections import deque
 
 import numpy as np
 import tensorflow as tf
-from keras.optimizers import Optimizer
-from keras.losses import huber
 
-from game.snake import Direction
+from game.data_structures import Direction, ObservationMode
 from a3c.model.actor_critic_model import ActorCriticModel
 from game.rl_game import RLGame
 from game.snake import Snake
-from a3c.model.actor_critic_model import initialize_model
-from a3c.training.support import log_progress
-
-eps = np.finfo(np.float32).eps.item()
+from a3c.model.actor_critic_model import create_act_function, initialize_model, sample_seed
+from a3c.training.checkpoint import Checkpointer
+from a3c.training.inference_server import InferenceServer
+from a3c.training.losses import LossConfig, compute_actor_critic_loss, get_total_loss
+from a3c.training.parameter_sync import ParameterSync
+from a3c.training.rollout_buffer import RolloutBuffer
+from a3c.training.support import TrainingLogger
 
 GLOBAL_EPISODE = 0
 GLOBAL_MOVING_AVERAGE = deque(maxlen=100)
 
 
-class Memory:
-    """Worker memory container."""
-
-    def __init__(self):
-        self.states: list = []
-        self.actions: list = []
-        self.rewards: list = []
-
-    def store(self, state: np.ndarray, action: int, reward: float):
-        self.states.append(state)
-        self.actions.append(action)
-        self.rewards.append(reward)
-
-    def clear(self):
-        self.states.clear()
-        self.actions.clear()
-        self.rewards.clear()
-
+def restore_progress(episode: int, rewards: list[float]):
+    """Set episode counter and moving average window of thread workers."""
+    global GLOBAL_EPISODE
+    GLOBAL_EPISODE = episode
+    GLOBAL_MOVING_AVERAGE.clear()
+    GLOBAL_MOVING_AVERAGE.extend(rewards)
 
-class Worker(threading.Thread):
-    """Worker class used for asynchronous training."""
 
-    save_lock = threading.Lock()
+class WorkerBase(ABC):
+    """Training loop shared by thread and process workers."""
 
     def __init__(
         self,
         save_dir: Path,
-        global_model: ActorCriticModel,
-        optimizer: Optimizer,
         worker_index: int,
         grid_size: int,
-        weights_path: Path,
-        global_episode: int,
+        observation_mode: str,
+        observation_dtype: Optional[str],
+        body_age: bool,
         gamma: float,
         update_freq: int,
         weights_save_freq: int,
         max_episodes: int,
+        loss_config: Optional[LossConfig] = None,
+        run_eagerly: bool = False,
+        jit_compile: bool = False,
     ):
-        super(Worker, self).__init__()
         self.save_dir = save_dir
-        self.global_model = global_model
-        self.env = RLGame(grid_size=grid_size, snake=Snake())
-        self.local_model = initialize_model(
-            observation=self.env.get_observation(), action_size=4, weights_path=weights_path
-        )
-
-        self.optimizer = optimizer
-
         self.index = worker_index
-        self.global_episode = global_episode
+        self.grid_size = grid_size
+        self.observation_mode = observation_mode
+        self.observation_dtype = observation_dtype
+        self.body_age = body_age
         self.max_episodes = max_episodes
         self.gamma = gamma
         self.update_freq = update_freq
         self.weights_save_freq = weights_save_freq
+        self.loss_config = loss_config or LossConfig()
+        self.run_eagerly = run_eagerly
+        self.jit_compile = jit_compile
+
+        self.env: RLGame
+        self.memory: RolloutBuffer
+        self.local_model: ActorCriticModel
+        self.act: Callable
+        self.compute_gradients: Callable
+
+    def build(self, weights_path: Optional[Path] = None):
+        """Create game and local model."""
+        self.env = RLGame(
+            grid_size=self.grid_size,
+            snake=Snake(),
+            observation_mode=self.observation_mode,
+            observation_dtype=self.observation_dtype,
+            body_age=self.body_age,
+        )
+        observation = self.env.get_observation()
+        # Body age values are not multiples of 1 / 255, so they are not compacted
+        compact = self.observation_mode != ObservationMode.GRID or not self.body_age
+        self.memory = RolloutBuffer(
+            capacity=int(self.update_freq) + 1, observation=observation, compact=compact
+        )
+        if self.index == 0:
+            print(
+                f"Rollout buffer: {self.memory.nbytes / 2**20:.1f} MB per worker "
+                f"({self.memory.capacity * observation.nbytes / 2**20:.1f} MB as "
+                f"{observation.dtype} observation stacks)"
+            )
+        self.local_model = self.create_local_model(
+            observation=observation, weights_path=weights_path
+        )
+        self.act = create_act_function(
+            model=self.local_model, observation=observation, jit_compile=self.jit_compile
+        )
+        self.compute_gradients = tf.function(
+            self.get_gradients,
+            input_signature=[
+                tf.TensorSpec(shape=(None,) + observation.shape, dtype=observation.dtype),
+                tf.TensorSpec(shape=(None,), dtype=tf.int32),
+                tf.TensorSpec(shape=(None,), dtype=tf.float32),
+                tf.TensorSpec(shape=observation.shape, dtype=observation.dtype),
+                tf.TensorSpec(shape=(), dtype=tf.bool),
+            ],
+            jit_compile=self.jit_compile,
+        )
 
-    def run(self) -> None:
-        """Start worker."""
-        global GLOBAL_EPISODE
-        global GLOBAL_MOVING_AVERAGE
-
-        memory = Memory()
-        while GLOBAL_EPISODE < self.max_episodes:
+    def create_local_model(
+        self, observation: np.ndarray, weights_path: Optional[Path]
+    ) -> ActorCriticModel:
+        """Create model used for acting and computing gradients."""
+        return initialize_model(observation=observation, action_size=4, weights_path=weights_path)
+
+    def select_action(self, state: np.ndarray) -> int:
+        """Sample action for state from policy."""
+        actions, _ = self.act(np.expand_dims(state, axis=0), sample_seed())
+        return int(actions[0])
+
+    @abstractmethod
+    def claim_episode(self) -> Optional[int]:
+        """Reserve index for the next episode. Return None when training is finished."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_global_model(self, gradients: list[tf.Tensor]):
+        """Apply gradients to global model and fetch latest global parameters."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def finish_episode(
+        self,
+        episode: int,
+        reward: float,
+        steps: int,
+        policy_loss: float,
+        value_loss: float,
+        duration: float,
+        update_latency: float,
+    ):
+        """Record finished episode. Duration and mean update latency are given in seconds."""
+        raise NotImplementedError
+
+    def train(self) -> None:
+        """Play episodes and update global model until training is finished."""
+        memory = self.memory
+        episode = self.claim_episode()
+        while episode is not None:
             self.env.reset_game()
             memory.clear()
             done = False
@@ -93,13 +161,14 @@ class Worker(threading.Thread):
             episode_reward = 0
             update_steps = 0
             episode_steps = 0
+            updates = 0
+            update_time = 0.0
+            episode_start = time.perf_counter()
 
             while not done:
                 # Play step
-                action_logits, value = self.local_model(tf.expand_dims(state, 0))
-                probs = tf.nn.softmax(action_logits)
-                action = np.random.choice(4, p=probs.numpy()[0])
-                new_direction = Direction.map_action_to_direction(action=action)
+                action = self.select_action(state=state)
+                new_direction = Direction(action)
                 self.env.snake.update_direction(new_direction=new_direction)
                 reward, done = self.env.update_game()
 
@@ -112,112 +181,214 @@ class Worker(threading.Thread):
                 episode_reward += reward
                 if done or update_steps == self.update_freq:
                     update_steps = 0
-
-                    with tf.GradientTape() as tape:
-                        policy_loss, value_loss = self.compute_loss(
-                            done=done, memory=memory, new_state=new_state
-                        )
-                        total_loss = tf.reduce_mean((0.5 * value_loss + policy_loss))
-
-                    gradients = tape.gradient(total_loss, self.local_model.trainable_weights)
-
-                    # Update global model parameters
-                    self.optimizer.apply_gradients(
-                        zip(gradients, self.global_model.trainable_weights)
+                    update_start = time.perf_counter()
+
+                    gradients, policy_loss, value_loss = self.compute_gradients(
+                        memory.get_states(),
+                        memory.get_actions(),
+                        memory.get_rewards(),
+                        new_state,
+                        done,
                     )
-
-                    # Fetch latest global parameters
-                    self.local_model.set_weights(self.global_model.get_weights())
-
-                    if done:
-                        GLOBAL_MOVING_AVERAGE.append(episode_reward)
-                        log_progress(
-                            worker_idx=self.index,
-                            global_episode=GLOBAL_EPISODE,
-                            reward=episode_reward,
-                            reward_moving_average=float(np.mean(GLOBAL_MOVING_AVERAGE)),
-                            steps=episode_steps,
-                            policy_loss=float(policy_loss.numpy()),
-                            value_loss=float(value_loss.numpy()),
-                            filepath=self.save_dir / 'training_log.csv',
-                        )
-
-                    # Save weights
-                    if GLOBAL_EPISODE % self.weights_save_freq == 0 and GLOBAL_EPISODE != 0:
-                        filepath = self.save_dir / f"{GLOBAL_EPISODE}_a3c.keras"
-                        with Worker.save_lock:
-                            self.global_model.save_weights(str(filepath))
-
+                    self.update_global_model(gradients=gradients)
                     memory.clear()
+                    updates += 1
+                    update_time += time.perf_counter() - update_start
 
                 update_steps += 1
                 episode_steps += 1
-            GLOBAL_EPISODE += 1
+
+            self.finish_episode(
+                episode=episode,
+                reward=episode_reward,
+                steps=episode_steps,
+                policy_loss=float(policy_loss.numpy()),
+                value_loss=float(value_loss.numpy()),
+                duration=time.perf_counter() - episode_start,
+                update_latency=update_time / updates,
+            )
+            episode = self.claim_episode()
+
+    def get_gradients(
+        self,
+        states: tf.Tensor,
+        actions: tf.Tensor,
+        rewards: tf.Tensor,
+        new_state: tf.Tensor,
+        done: tf.Tensor,
+    ) -> (list[tf.Tensor], tf.Tensor, tf.Tensor):
+        """Compute gradients of the total loss and the policy and value losses."""
+        with tf.GradientTape() as tape:
+            policy_loss, value_loss, entropy = self.compute_loss(
+                states=states, actions=actions, rewards=rewards, new_state=new_state, done=done
+            )
+            total_loss = get_total_loss(
+                policy_loss=policy_loss,
+                value_loss=value_loss,
+                entropy=entropy,
+                config=self.loss_config,
+            )
+
+        gradients = tape.gradient(total_loss, self.local_model.trainable_weights)
+        return gradients, policy_loss, value_loss
 
     def compute_loss(
-        self, done: bool, memory: Memory, new_state: np.ndarray
-    ) -> (tf.Tensor, tf.Tensor):
+        self,
+        states: tf.Tensor,
+        actions: tf.Tensor,
+        rewards: tf.Tensor,
+        new_state: tf.Tensor,
+        done: tf.Tensor,
+    ) -> (tf.Tensor, tf.Tensor, tf.Tensor):
         """Compute loss to guide agents training."""
         reward_sum = self.get_reward_sum(done=done, new_state=new_state)
-        discounted_rewards = self.get_discounted_rewards(
-            reward_sum=reward_sum, rewards=memory.rewards, gamma=self.gamma
+        # One forward pass over the whole rollout
+        action_logits, value_estimates = self.local_model(states)
+
+        # Rollout is a single game, episode end is handled by zero reward_sum
+        rewards = tf.expand_dims(rewards, axis=1)
+        return compute_actor_critic_loss(
+            action_logits=action_logits,
+            value_estimates=value_estimates,
+            actions=actions,
+            rewards=rewards,
+            dones=tf.zeros_like(rewards, dtype=tf.bool),
+            bootstrap_values=tf.expand_dims(reward_sum, axis=0),
+            gamma=self.gamma,
+            config=self.loss_config,
         )
-        action_logits, value_estimates, action_probs = self.get_probabilities_and_value_estimates(
-            states=memory.states, actions=memory.actions
+
+    def get_reward_sum(self, done: tf.Tensor, new_state: tf.Tensor) -> tf.Tensor:
+        """If game didn't terminate estimate latest reward with Critic."""
+        reward_sum = tf.cond(
+            done,
+            lambda: tf.constant(0.0),
+            lambda: self.local_model(tf.expand_dims(new_state, axis=0))[1][0, 0],
         )
-        advantage = discounted_rewards - value_estimates
+        # Bootstrapped value is a constant target
+        return tf.stop_gradient(reward_sum)
 
-        value_loss = tf.reduce_sum(huber(discounted_rewards, value_estimates))
-        # value_loss = tf.reduce_mean(advantage ** 2) #MSE
 
-        log_probabilities = -tf.math.log(action_probs)
-        policy_loss = tf.reduce_sum(log_probabilities * tf.stop_gradient(advantage))
-        return policy_loss, value_loss
+class Worker(WorkerBase, threading.Thread):
+    """Worker thread used for asynchronous training."""
 
-    def get_reward_sum(self, done: bool, new_state: np.ndarray) -> float:
-        """If game didn't terminate estimate latest reward with Critic."""
-        if done:
-            return 0.0
-        _, value_estimate = self.local_model(tf.expand_dims(new_state, axis=0))
-        return float(value_estimate.numpy())
-
-    @staticmethod
-    def get_discounted_rewards(reward_sum: float, rewards: list[float], gamma: float) -> tf.Tensor:
-        """Calculate discounted rewards."""
-        discounted_rewards = []
-
-        # Start discounting from the final reward
-        for reward in reversed(rewards):
-            reward_sum = reward + gamma * reward_sum
-            discounted_rewards.append([reward_sum])  # Make format compatible with Tensors
-
-        discounted_rewards.reverse()
-        discounted_rewards = tf.convert_to_tensor(discounted_rewards)
-
-        # Normalize
-        discounted_rewards = (discounted_rewards - tf.math.reduce_mean(discounted_rewards)) / (
-            tf.math.reduce_std(discounted_rewards) + eps
+    episode_lock = threading.Lock()
+
+    def __init__(
+        self,
+        save_dir: Path,
+        global_model: ActorCriticModel,
+        parameter_sync: ParameterSync,
+        worker_index: int,
+        grid_size: int,
+        weights_path: Path,
+        observation_mode: str,
+        observation_dtype: Optional[str],
+        body_age: bool,
+        global_episode: int,
+        gamma: float,
+        update_freq: int,
+        weights_save_freq: int,
+        max_episodes: int,
+        logger: TrainingLogger,
+        checkpointer: Checkpointer,
+        loss_config: Optional[LossConfig] = None,
+        run_eagerly: bool = False,
+        jit_compile: bool = False,
+        inference_server: Optional[InferenceServer] = None,
+    ):
+        # Daemon threads do not keep interrupted training running
+        threading.Thread.__init__(self, daemon=True)
+        WorkerBase.__init__(
+            self,
+            save_dir=save_dir,
+            worker_index=worker_index,
+            grid_size=grid_size,
+            observation_mode=observation_mode,
+            observation_dtype=observation_dtype,
+            body_age=body_age,
+            gamma=gamma,
+            update_freq=update_freq,
+            weights_save_freq=weights_save_freq,
+            max_episodes=max_episodes,
+            loss_config=loss_config,
+            run_eagerly=run_eagerly,
+            jit_compile=jit_compile,
+        )
+        self.global_model = global_model
+        self.parameter_sync = parameter_sync
+        self.global_episode = global_episode
+        self.inference_server = inference_server
+        self.logger = logger
+        self.checkpointer = checkpointer
+        self.build(weights_path=weights_path)
+        # Workers start from global parameters
+        self.parameters_version = self.parameter_sync.sync(
+            worker_idx=self.index, model=self.local_model
         )
 
-        return discounted_rewards
+    def run(self) -> None:
+        """Start worker."""
+        self.train()
+
+    def create_local_model(
+        self, observation: np.ndarray, weights_path: Optional[Path]
+    ) -> ActorCriticModel:
+        # Inference server runs the global model, so gradients are computed with it directly
+        if self.inference_server is not None:
+            return self.global_model
+        return super().create_local_model(observation=observation, weights_path=weights_path)
+
+    def select_action(self, state: np.ndarray) -> int:
+        if self.inference_server is not None:
+            return self.inference_server.submit(state=state)
+        return super().select_action(state=state)
+
+    def claim_episode(self) -> Optional[int]:
+        global GLOBAL_EPISODE
 
-    def get_probabilities_and_value_estimates(
-        self, states: list[np.ndarray], actions: list[int]
-    ) -> (tf.Tensor, tf.Tensor, tf.Tensor):
-        """Do inference to get action probabilities and value estimates for GradientTape."""
-        logits_selected_actions = []
-        probabilities_selected_actions = []
-        value_estimates = []
-        for idx, state in enumerate(states):
-            action_logits, value_estimate = self.local_model(tf.expand_dims(state, axis=0))
-            logits_selected_actions.append(action_logits[0])
-            value_estimates.append(value_estimate[0])
-
-            action_probabilities = tf.nn.softmax(action_logits)
-            selected_action = actions[idx]
-            probabilities_selected_actions.append([action_probabilities[0][selected_action]])
-
-        logits_selected_actions = tf.convert_to_tensor(logits_selected_actions)
-        value_estimates = tf.convert_to_tensor(value_estimates)
-        probabilities_selected_actions = tf.convert_to_tensor(probabilities_selected_actions)
-        return logits_selected_actions, value_estimates, probabilities_selected_actions
+        with Worker.episode_lock:
+            if GLOBAL_EPISODE >= self.max_episodes:
+                return None
+            episode = GLOBAL_EPISODE
+            GLOBAL_EPISODE += 1
+        return episode
+
+    def update_global_model(self, gradients: list[tf.Tensor]):
+        version = self.parameter_sync.apply_gradients(
+            worker_idx=self.index, gradients=gradients, version=self.parameters_version
+        )
+        if self.inference_server is None:
+            version = self.parameter_sync.sync(worker_idx=self.index, model=self.local_model)
+        self.parameters_version = version
+
+    def finish_episode(
+        self,
+        episode: int,
+        reward: float,
+        steps: int,
+        policy_loss: float,
+        value_loss: float,
+        duration: float,
+        update_latency: float,
+    ):
+        with Worker.episode_lock:
+            GLOBAL_MOVING_AVERAGE.append(reward)
+            moving_average = float(np.mean(GLOBAL_MOVING_AVERAGE))
+
+        self.logger.log_progress(
+            worker_idx=self.index,
+            global_episode=episode,
+            reward=reward,
+            reward_moving_average=moving_average,
+            steps=steps,
+            policy_loss=policy_loss,
+            value_loss=value_loss,
+            steps_per_sec=steps / duration,
+            update_latency=update_latency,
+        )
+
+        # Save checkpoint, optimizer is not updated while state is copied
+        if episode % self.weights_save_freq == 0 and episode != 0:
+            with self.parameter_sync.lock, Worker.episode_lock:
+                self.checkpointer.save(episode=episode, moving_average=GLOBAL_MOVING_AVERAGE)
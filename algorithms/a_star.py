@@ -19,6 +19,11 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "--repeats", type=int, default=10, help="Specify how many repeats game is running."
     )
+    parser.add_argument(
+        "--time_aware",
+        action="store_true",
+        help="Plan with body cells freeing up as the tail retracts.",
+    )
     return parser.parse_args()
 
 
@@ -33,8 +38,9 @@ def main():
         path = get_a_star_path(
             goal=env.food,
             start=env.snake.head_position,
-            obstacles=env.snake.body,
+            obstacles=env.snake.get_body_cells(),
             grid_size=args.grid_size,
+            time_aware=args.time_aware,
         )
 
         for i in range(0, len(path)):
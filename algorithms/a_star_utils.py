@@ -1,155 +1,134 @@
-from copy import deepcopy
+import heapq
 from random import shuffle
-from typing import Optional
+from typing import Sequence, Union
 
 import numpy as np
 
-from game.data_structures import Position, Direction
-
-
-class NodeCost:
-    def __init__(self, path_cost: float, heuristic_cost: float, direction: Optional[str] = None):
-        self.position = Position
-        self.path_cost = path_cost
-        self.heuristic_cost = heuristic_cost
-        self.total_cost = path_cost + heuristic_cost
-        self.direction = direction
-
-
-def distance_to_point(start: Position, end: Position) -> float:
-    """Calculate Euclidean distance between points."""
-    return np.sqrt((start.x - end.x) ** 2 + (start.y - end.y) ** 2)
-
-
-def is_position_allowed(position: Position, obstacles: list[Position], grid_size: int) -> bool:
-    """Check that position is not outside of grid and not inside of obstacles."""
-    if 0 <= position.x < grid_size and 0 <= position.y < grid_size:
-        for obstacle in obstacles:
-            if position.x == obstacle.x and position.y == obstacle.y:
-                return False
-        return True
-    return False
-
-
-def is_node_in_list(node: Position, node_list: list[Position]) -> bool:
-    """Check if node is in list."""
-    for closed_node in node_list:
-        if node.x == closed_node.x and node.y == closed_node.y:
-            return True
-    return False
-
-
-def calculate_cost(
-    start: Position, current_position: Position, goal: Position, direction: Optional[str] = None
-) -> NodeCost:
-    """Calculate cost for given node."""
-    path_cost = distance_to_point(start=start, end=current_position)
-    heuristic_cost = distance_to_point(start=current_position, end=goal)
-    return NodeCost(path_cost=path_cost, heuristic_cost=heuristic_cost, direction=direction)
-
-
-def get_node_idx_with_lowest_cost(node_costs: list[NodeCost]) -> int:
-    """Return index of node with the lowest cost."""
-    lowest_idx, _ = min(enumerate(node_costs), key=lambda x: x[1].total_cost)
-    return lowest_idx
-
-
-def is_current_goal(current: Position, goal: Position) -> bool:
-    """Check if current position is equal to goal."""
-    if current.x == goal.x and current.y == goal.y:
-        return True
-    return False
+from game.data_structures import X_STEPS, Y_STEPS, Direction, Position
 
 
 def get_random_direction(
     current_node: Position,
-    obstacles: list[Position],
-    possible_directions: list[str],
+    free_steps: list[int],
+    possible_directions: list[Direction],
     grid_size: int,
-) -> list[str]:
-    """If no path routes are available, return random direction."""
+) -> list[Direction]:
+    """If no path routes are available, return direction to a cell free after one step or a
+    random direction."""
     for direction in possible_directions:
-        neighbour_node = Position(
-            x=current_node.x + Direction.get_x_step(direction),
-            y=current_node.y + Direction.get_y_step(direction),
-        )
-        if is_position_allowed(position=neighbour_node, obstacles=obstacles, grid_size=grid_size):
+        x = current_node.x + X_STEPS[direction]
+        y = current_node.y + Y_STEPS[direction]
+        if 0 <= x < grid_size and 0 <= y < grid_size and free_steps[y * grid_size + x] <= 1:
             return [direction]
 
-    return [np.random.choice([Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP])]
+    return [Direction(np.random.choice(list(Direction)))]
+
+
+def get_free_steps(
+    obstacles: Sequence[Union[Position, int]], grid_size: int, time_aware: bool
+) -> list[int]:
+    """Return number of steps after which each cell (y * grid_size + x) can be entered.
+
+    Obstacles are positions or cell indices, and obstacles outside the grid are ignored. Static
+    obstacles never free up during the search. In time-aware mode obstacles are snake body from
+    head to tail and the body part i frees up after len(body) - i steps as the tail retracts.
+    """
+    cells = grid_size * grid_size
+    free_steps = [0] * cells
+    for idx, obstacle in enumerate(obstacles):
+        if isinstance(obstacle, Position):
+            if not (0 <= obstacle.x < grid_size and 0 <= obstacle.y < grid_size):
+                continue
+            cell = obstacle.y * grid_size + obstacle.x
+        elif 0 <= obstacle < cells:
+            cell = obstacle
+        else:
+            continue
+        steps = len(obstacles) - idx if time_aware else cells
+        free_steps[cell] = max(free_steps[cell], steps)
+    return free_steps
 
 
 def get_a_star_path(
     goal: Position,
     start: Position,
-    obstacles: list[Position],
+    obstacles: Sequence[Union[Position, int]],
     grid_size: int,
-) -> list[str]:
-    """Use A* algorithm to find optimal path from goal to start."""
-    node_cost = calculate_cost(start=start, current_position=start, goal=goal)
-    open_nodes = [start]
-    node_costs = [node_cost]
-    closed_nodes = []
-
+    time_aware: bool = False,
+) -> list[Direction]:
+    """Use A* algorithm to find shortest path from start to goal.
+
+    Cost of the path is the number of steps and heuristic is Manhattan distance to goal. Open
+    nodes are kept in a binary heap and the path is rebuilt from parent pointers of grid cells.
+    Obstacles are positions or cell indices (y * grid_size + x) like Snake.get_body_cells returns
+    them. With time_aware obstacles must be the snake body, and a body cell can be entered once the
+    tail has retracted from it. Each cell is entered at most once, so the path never crosses
+    the part of the body it creates itself.
+    """
     possible_directions = [Direction.RIGHT, Direction.UP, Direction.LEFT, Direction.DOWN]
     shuffle(possible_directions)
-    path_to_current = [None]
-    possible_paths = [path_to_current]
-
-    path = []
-    while True:
-        # No route available
-        if not open_nodes and closed_nodes:
-            return get_random_direction(
-                current_node=start,
-                obstacles=obstacles,
-                possible_directions=possible_directions,
-                grid_size=grid_size,
-            )
-
-        lowest_idx = get_node_idx_with_lowest_cost(node_costs=node_costs)
-        current_node = open_nodes[lowest_idx]
-        closed_nodes.append(current_node)
-
-        path_to_current = possible_paths[lowest_idx]
-        possible_paths.pop(lowest_idx)
-
-        if node_costs[lowest_idx].direction:
-            path.append(node_costs[lowest_idx].direction)
-
-        open_nodes.pop(lowest_idx)
-        node_costs.pop(lowest_idx)
-
-        if is_current_goal(current=current_node, goal=goal):
-            break
+    steps = [
+        (direction, X_STEPS[direction], Y_STEPS[direction]) for direction in possible_directions
+    ]
+
+    cells = grid_size * grid_size
+    free_steps = get_free_steps(obstacles=obstacles, grid_size=grid_size, time_aware=time_aware)
+    closed = bytearray(cells)
+    path_costs = [cells] * cells
+    parents = [-1] * cells
+    parent_directions = [None] * cells
+
+    start_cell = start.y * grid_size + start.x
+    goal_cell = goal.y * grid_size + goal.x
+    path_costs[start_cell] = 0
+
+    # Ties are broken towards the goal, counter keeps equal entries in insertion order
+    counter = 0
+    heuristic_cost = abs(goal.x - start.x) + abs(goal.y - start.y)
+    open_nodes = [(heuristic_cost, heuristic_cost, counter, start_cell)]
+    while open_nodes:
+        _, _, _, cell = heapq.heappop(open_nodes)
+        if closed[cell]:
+            continue
+
+        if cell == goal_cell:
+            path = []
+            while cell != start_cell:
+                path.append(parent_directions[cell])
+                cell = parents[cell]
+            path.reverse()
+            return path
+
+        closed[cell] = 1
+        x = cell % grid_size
+        y = cell // grid_size
+        neighbour_cost = path_costs[cell] + 1
 
         # Check neighbouring nodes
-        for direction in possible_directions:
-            path_to_current_copy = deepcopy(path_to_current)
-            neighbour_node = Position(
-                x=current_node.x + Direction.get_x_step(direction),
-                y=current_node.y + Direction.get_y_step(direction),
-            )
-            if not is_position_allowed(
-                position=neighbour_node, obstacles=obstacles, grid_size=grid_size
-            ):
+        for direction, x_step, y_step in steps:
+            neighbour_x = x + x_step
+            neighbour_y = y + y_step
+            if not (0 <= neighbour_x < grid_size and 0 <= neighbour_y < grid_size):
                 continue
 
-            if is_node_in_list(node=neighbour_node, node_list=closed_nodes):
+            neighbour = neighbour_y * grid_size + neighbour_x
+            if closed[neighbour] or neighbour_cost >= path_costs[neighbour]:
+                continue
+            if neighbour_cost < free_steps[neighbour]:
                 continue
 
-            if not is_node_in_list(node=neighbour_node, node_list=open_nodes):
-                neighbour_node_cost = calculate_cost(
-                    start=start, current_position=neighbour_node, goal=goal, direction=direction
-                )
-                open_nodes.append(neighbour_node)
-                node_costs.append(neighbour_node_cost)
-                path_to_current_copy.append(direction)
-                possible_paths.append(path_to_current_copy)
-
-    final_path = []
-    for step in path_to_current:
-        if step:
-            final_path.append(step)
-
-    return final_path
+            path_costs[neighbour] = neighbour_cost
+            parents[neighbour] = cell
+            parent_directions[neighbour] = direction
+            counter += 1
+            heuristic_cost = abs(goal.x - neighbour_x) + abs(goal.y - neighbour_y)
+            total_cost = neighbour_cost + heuristic_cost
+            heapq.heappush(open_nodes, (total_cost, heuristic_cost, counter, neighbour))
+
+    # No route available. Tail moves away during the next step in time-aware mode.
+    return get_random_direction(
+        current_node=start,
+        free_steps=free_steps,
+        possible_directions=possible_directions,
+        grid_size=grid_size,
+    )
@@ -0,0 +1,150 @@
+"""Hamiltonian cycles of rectangular grids stored as integer lookup tables.
+
+A grid graph has a Hamiltonian cycle only if it has at least 2 rows and 2 columns and an even
+number of cells. Grids where both sides are odd (e.g. 5x5 or 7x9) are impossible, because every
+step changes the color of a checkerboard cell and a closed loop must visit as many black cells as
+white cells.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from game.data_structures import X_STEPS, Y_STEPS, Direction
+
+CACHE_DIR = Path.home() / ".cache" / "snake_ai" / "hamiltonian"
+
+
+@dataclass
+class HamiltonianCycle:
+    """Direction code of every cell and cell position along the cycle.
+
+    Both tables are indexed [y, x]. Cycle index of the top left cell is 0.
+    """
+
+    directions: npt.NDArray[np.int8]
+    cycle_index: npt.NDArray[np.int32]
+
+    @property
+    def length(self) -> int:
+        return self.directions.size
+
+
+def _create_column_cycle(rows: int, cols: int) -> npt.NDArray[np.int8]:
+    """Top row moves right, right column down and columns zigzag back. Needs even cols."""
+    directions = np.zeros(shape=(rows, cols), dtype=np.int8)
+
+    # Top row move right
+    directions[0, :-1] = Direction.RIGHT
+
+    # Right column move down
+    directions[:-1, -1] = Direction.DOWN
+
+    # Bottom right corner move left
+    directions[-1, -1] = Direction.LEFT
+
+    # Add zigzag from bottom right corner
+    for col in reversed(range(1, cols - 1)):
+        # Even columns
+        if (col % 2) == 0:
+            directions[1, col] = Direction.LEFT
+            directions[2:, col] = Direction.UP
+        else:
+            directions[1:-1, col] = Direction.DOWN
+            directions[-1, col] = Direction.LEFT
+
+    # Left column move up
+    directions[1:, 0] = Direction.UP
+    return directions
+
+
+def _create_row_cycle(rows: int, cols: int) -> npt.NDArray[np.int8]:
+    """Rows zigzag down from the top row and left column returns up. Needs even rows."""
+    directions = np.zeros(shape=(rows, cols), dtype=np.int8)
+
+    for row in range(rows):
+        # Even rows move right and odd rows move left, left column is kept for the way back
+        if (row % 2) == 0:
+            directions[row, :-1] = Direction.RIGHT
+            directions[row, -1] = Direction.DOWN
+        else:
+            directions[row, 2:] = Direction.LEFT
+            directions[row, 1] = Direction.DOWN
+
+    # Bottom row continues to left column
+    directions[-1, 1] = Direction.LEFT
+
+    # Left column move up
+    directions[1:, 0] = Direction.UP
+    return directions
+
+
+def _get_cycle_index(directions: npt.NDArray[np.int8]) -> npt.NDArray[np.int32]:
+    """Follow directions from the top left cell and number visited cells.
+
+    Raise ValueError when directions do not form a single cycle through every cell.
+    """
+    rows, cols = directions.shape
+    cycle_index = np.full(shape=(rows, cols), fill_value=-1, dtype=np.int32)
+    x, y = 0, 0
+    for idx in range(directions.size):
+        if not (0 <= x < cols and 0 <= y < rows) or cycle_index[y, x] != -1:
+            raise ValueError(f"Directions do not form a Hamiltonian cycle of {rows}x{cols} grid.")
+        cycle_index[y, x] = idx
+        direction = directions[y, x]
+        x, y = x + X_STEPS[direction], y + Y_STEPS[direction]
+
+    if (x, y) != (0, 0):
+        raise ValueError(f"Directions do not form a Hamiltonian cycle of {rows}x{cols} grid.")
+    return cycle_index
+
+
+def create_hamiltonian_cycle(rows: int, cols: Optional[int] = None) -> HamiltonianCycle:
+    """Create Hamiltonian cycle of grid with rows and cols. Square grid if cols is not given.
+
+    Top row always moves right, so the cycle continues the snake's starting direction.
+    """
+    cols = rows if cols is None else cols
+    if rows < 2 or cols < 2:
+        raise ValueError(f"Grid {rows}x{cols} has no Hamiltonian cycle, both sides must be >= 2.")
+    if (rows % 2) == 1 and (cols % 2) == 1:
+        raise ValueError(
+            f"Grid {rows}x{cols} has no Hamiltonian cycle, one of the sides must be even."
+        )
+
+    if (cols % 2) == 0 and rows > 2:
+        directions = _create_column_cycle(rows=rows, cols=cols)
+    else:
+        directions = _create_row_cycle(rows=rows, cols=cols)
+    return HamiltonianCycle(directions=directions, cycle_index=_get_cycle_index(directions))
+
+
+@lru_cache
+def load_hamiltonian_cycle(
+    rows: int, cols: Optional[int] = None, cache_dir: Path = CACHE_DIR
+) -> HamiltonianCycle:
+    """Return Hamiltonian cycle from cache_dir or create and save it there.
+
+    Cycles are also kept in memory, so callers must not modify the returned tables.
+    """
+    cols = rows if cols is None else cols
+    filepath = cache_dir / f"hamiltonian_{rows}x{cols}.npz"
+    if filepath.exists():
+        with np.load(filepath) as data:
+            return HamiltonianCycle(directions=data['directions'], cycle_index=data['cycle_index'])
+
+    cycle = create_hamiltonian_cycle(rows=rows, cols=cols)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename, so parallel processes never read partial files
+        temp_filepath = cache_dir / f"hamiltonian_{rows}x{cols}.{os.getpid()}.tmp.npz"
+        np.savez(temp_filepath, directions=cycle.directions, cycle_index=cycle.cycle_index)
+        os.replace(temp_filepath, filepath)
+    except OSError:
+        # Cache is optional, cycles are cheap to recreate
+        pass
+    return cycle
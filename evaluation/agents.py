@@ -0,0 +1,166 @@
+"""Agents playing the Snake game in evaluations."""
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from algorithms.a_star_utils import get_a_star_path
+from algorithms.hamiltonian_cycle import load_hamiltonian_cycle
+from game.basic_game import BasicGame
+from game.data_structures import X_STEPS, Y_STEPS, Direction, ObservationMode
+from game.rl_game import RLGame
+from game.snake import Snake
+
+
+class Agent(ABC):
+    """Abstract implementation for agent choosing snake directions."""
+
+    def __init__(self, grid_size: int):
+        self.grid_size = grid_size
+
+    def create_game(self) -> BasicGame:
+        """Create headless game for the agent."""
+        return BasicGame(grid_size=self.grid_size, snake=Snake())
+
+    def reset(self):
+        """Clear state kept between steps of an episode."""
+        return
+
+    @abstractmethod
+    def get_direction(self, env: BasicGame) -> Direction:
+        """Return direction for the next step."""
+        raise NotImplementedError
+
+
+class HamiltonianAgent(Agent):
+    """Agent following Hamiltonian cycle."""
+
+    def __init__(self, grid_size: int):
+        super().__init__(grid_size=grid_size)
+        self.hamiltonian_cycle = load_hamiltonian_cycle(rows=grid_size)
+
+    def get_direction(self, env: BasicGame) -> Direction:
+        head = env.snake.head_position
+        return Direction(self.hamiltonian_cycle.directions[head.y, head.x])
+
+
+class ShortcutHamiltonianAgent(HamiltonianAgent):
+    """Agent following Hamiltonian cycle and skipping cycle segments on the way to food.
+
+    Snake body stays ordered along the cycle from tail to head, so cells ahead of head and
+    before tail in cycle order are always free. Moves only to such cells keep the order and
+    the snake never dies. From the allowed neighbours agent takes the longest jump that does
+    not pass the food. Safety margin keeps extra cells free in front of tail.
+    """
+
+    def __init__(self, grid_size: int, safety_margin: int = 0):
+        super().__init__(grid_size=grid_size)
+        self.safety_margin = safety_margin
+
+    def get_direction(self, env: BasicGame) -> Direction:
+        cycle_index = self.hamiltonian_cycle.cycle_index
+        length = self.hamiltonian_cycle.length
+        head, tail = env.snake.head_position, env.snake.body[-1]
+        head_idx = cycle_index[head.y, head.x]
+        tail_distance = (cycle_index[tail.y, tail.x] - head_idx) % length
+        food_distance = (cycle_index[env.food.y, env.food.x] - head_idx) % length
+
+        # Next cell of the cycle is always allowed
+        best_direction = super().get_direction(env=env)
+        best_distance = 1
+        for direction in Direction:
+            x = head.x + X_STEPS[direction]
+            y = head.y + Y_STEPS[direction]
+            if not (0 <= x < self.grid_size and 0 <= y < self.grid_size):
+                continue
+            distance = (cycle_index[y, x] - head_idx) % length
+            if best_distance < distance <= food_distance and (
+                distance < tail_distance - self.safety_margin
+            ):
+                best_direction, best_distance = direction, distance
+        return best_direction
+
+
+class AStarAgent(Agent):
+    """Agent following A* path to food and planning new path when previous one is used."""
+
+    def __init__(self, grid_size: int, time_aware: bool = False):
+        super().__init__(grid_size=grid_size)
+        self.time_aware = time_aware
+        self.path: deque[Direction] = deque()
+
+    def reset(self):
+        self.path.clear()
+
+    def get_direction(self, env: BasicGame) -> Direction:
+        if not self.path:
+            self.path.extend(
+                get_a_star_path(
+                    goal=env.food,
+                    start=env.snake.head_position,
+                    obstacles=env.snake.get_body_cells(),
+                    grid_size=self.grid_size,
+                    time_aware=self.time_aware,
+                )
+            )
+        return self.path.popleft()
+
+
+class A3CAgent(Agent):
+    """Agent sampling directions from actor-critic model."""
+
+    def __init__(
+        self,
+        grid_size: int,
+        weights_path: Optional[Path] = None,
+        observation_mode: str = ObservationMode.PIXELS,
+        observation_dtype: Optional[str] = None,
+        body_age: bool = False,
+    ):
+        super().__init__(grid_size=grid_size)
+        # Tensorflow is imported only when model is needed
+        from a3c.model.actor_critic_model import create_act_function, initialize_model, sample_seed
+
+        self.observation_mode = observation_mode
+        self.observation_dtype = observation_dtype
+        self.body_age = body_age
+        self.sample_seed = sample_seed
+        observation = self.create_game().get_observation()
+        self.model = initialize_model(
+            observation=observation, action_size=4, weights_path=weights_path
+        )
+        self.act = create_act_function(model=self.model, observation=observation)
+
+    def create_game(self) -> RLGame:
+        return RLGame(
+            grid_size=self.grid_size,
+            snake=Snake(),
+            observation_mode=self.observation_mode,
+            observation_dtype=self.observation_dtype,
+            body_age=self.body_age,
+        )
+
+    def get_direction(self, env: RLGame) -> Direction:
+        state = env.get_observation()
+        actions, _ = self.act(np.expand_dims(state, axis=0), self.sample_seed())
+        return Direction(int(actions[0]))
+
+
+AGENTS = ["hamiltonian", "hamiltonian_shortcut", "a_star", "a_star_time_aware", "a3c"]
+
+
+def create_agent(name: str, grid_size: int, **a3c_options) -> Agent:
+    """Create agent by name. A3C options are passed to A3CAgent."""
+    if name == "hamiltonian":
+        return HamiltonianAgent(grid_size=grid_size)
+    if name == "hamiltonian_shortcut":
+        return ShortcutHamiltonianAgent(grid_size=grid_size)
+    if name == "a_star":
+        return AStarAgent(grid_size=grid_size)
+    if name == "a_star_time_aware":
+        return AStarAgent(grid_size=grid_size, time_aware=True)
+    if name == "a3c":
+        return A3CAgent(grid_size=grid_size, **a3c_options)
+    raise ValueError(f"Unknown agent: {name}")
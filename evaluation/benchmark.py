@@ -0,0 +1,143 @@
+"""Headless benchmark for all agents."""
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+import argparse
+import time
+from pathlib import Path
+
+from evaluation.agents import AGENTS, create_agent
+from evaluation.pool import evaluate_parallel
+from evaluation.report import write_report
+from evaluation.runner import DEFAULT_MAX_STEPS, evaluate_agent, summarize_results
+from game.data_structures import ObservationMode
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark agents without game window.")
+    parser.add_argument(
+        "--agents",
+        type=str,
+        nargs="+",
+        default=["hamiltonian", "a_star"],
+        choices=AGENTS,
+        help="Agents to benchmark.",
+    )
+    parser.add_argument(
+        "--grid_sizes", type=int, nargs="+", default=[6], help="Grid sizes to benchmark."
+    )
+    parser.add_argument(
+        "--episodes", type=int, default=10, help="Specify how many episodes each agent plays."
+    )
+    parser.add_argument(
+        "--max_steps",
+        type=int,
+        default=DEFAULT_MAX_STEPS,
+        help="Step limit for a single episode.",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the first episode, next ones add 1."
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Play episodes in parallel processes. Throughput then includes process start-up.",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Path to save results as JSON file."
+    )
+    parser.add_argument(
+        "--weights_path", type=Path, default=None, help="Path to A3C model weights (.keras)"
+    )
+    parser.add_argument(
+        "--observation_mode",
+        type=str,
+        default=ObservationMode.PIXELS,
+        choices=[ObservationMode.PIXELS, ObservationMode.GRID],
+        help="Observation mode of A3C model.",
+    )
+    parser.add_argument(
+        "--body_age", action="store_true", help="Add body age channel to grid observations."
+    )
+    return parser.parse_args()
+
+
+def print_steps_to_win_comparison(results: list[dict]):
+    """Print steps to win of every agent relative to plain Hamiltonian cycle on the same grid."""
+    baselines = {
+        result["grid_size"]: result["steps_to_win_mean"]
+        for result in results
+        if result["agent"] == "hamiltonian" and result["steps_to_win_mean"]
+    }
+    for result in results:
+        baseline = baselines.get(result["grid_size"])
+        if result["agent"] == "hamiltonian" or baseline is None:
+            continue
+        steps_to_win = result["steps_to_win_mean"]
+        relative = "-" if steps_to_win is None else f"{steps_to_win / baseline:.2f}x"
+        print(
+            f"{result['agent']} {result['grid_size']}x{result['grid_size']}: "
+            f"steps to win vs hamiltonian: {relative}"
+        )
+
+
+def main():
+    args = parse_arguments()
+    agent_options = {
+        "weights_path": args.weights_path,
+        "observation_mode": args.observation_mode,
+        "body_age": args.body_age,
+    }
+
+    results = []
+    for grid_size in args.grid_sizes:
+        for agent_name in args.agents:
+            if args.processes > 1:
+                start_time = time.perf_counter()
+                episodes = evaluate_parallel(
+                    agent_name=agent_name,
+                    grid_size=grid_size,
+                    episodes=args.episodes,
+                    processes=args.processes,
+                    max_steps=args.max_steps,
+                    seed=args.seed,
+                    **agent_options,
+                )
+                wall_time = time.perf_counter() - start_time
+            else:
+                agent = create_agent(name=agent_name, grid_size=grid_size, **agent_options)
+                episodes = evaluate_agent(
+                    agent=agent, episodes=args.episodes, max_steps=args.max_steps, seed=args.seed
+                )
+                wall_time = None
+
+            summary = {
+                "agent": agent_name,
+                "grid_size": grid_size,
+                "processes": args.processes,
+                **summarize_results(results=episodes, wall_time=wall_time),
+            }
+            results.append(summary)
+            steps_to_win = summary['steps_to_win_mean']
+            print(
+                f"{agent_name} {grid_size}x{grid_size}: "
+                f"steps/sec: {summary['steps_per_sec']:.0f}, "
+                f"episodes/sec: {summary['episodes_per_sec']:.2f}, "
+                f"score: {summary['score_mean']:.1f} (p50 {summary['score_p50']:.0f}, "
+                f"p90 {summary['score_p90']:.0f}), "
+                f"win rate: {summary['win_rate']:.2f}, "
+                f"episode length: {summary['episode_length_mean']:.0f}, "
+                f"steps to win: {'-' if steps_to_win is None else f'{steps_to_win:.0f}'}"
+            )
+
+    print_steps_to_win_comparison(results=results)
+
+    if args.output:
+        write_report(filepath=args.output, args=args, results=results)
+
+
+if __name__ == '__main__':
+    main()
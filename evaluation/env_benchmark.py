@@ -0,0 +1,100 @@
+"""Compare steps per second of gym Snake environments with random actions."""
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+import argparse
+import time
+from pathlib import Path
+
+import gym
+import numpy as np
+
+import game.snake_env  # noqa: F401, registers environments
+from evaluation.report import write_report
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gym environment throughput benchmark.")
+    parser.add_argument(
+        "--grid_size", type=int, default=6, help="Specify the grid size for the game."
+    )
+    parser.add_argument(
+        "--num_envs", type=int, default=8, help="Number of environments in vector variants."
+    )
+    parser.add_argument(
+        "--steps", type=int, default=2000, help="Steps played in every environment."
+    )
+    parser.add_argument(
+        "--asynchronous",
+        action="store_true",
+        help="Benchmark also gym AsyncVectorEnv running environments in processes.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of games and actions.")
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Path to save results as JSON file."
+    )
+    return parser.parse_args()
+
+
+def benchmark_env(env: gym.Env, steps: int, seed: int) -> float:
+    """Play random actions in single environment and return steps per second."""
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(low=0, high=env.action_space.n, size=steps)
+    env.reset(seed=seed)
+    start_time = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    return steps / (time.perf_counter() - start_time)
+
+
+def benchmark_vector_env(env: gym.vector.VectorEnv, steps: int, seed: int) -> float:
+    """Play random actions in vectorized environments and return steps per second of all games.
+
+    Vector environments reset finished games themselves.
+    """
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(low=0, high=env.single_action_space.n, size=(steps, env.num_envs))
+    env.reset(seed=seed)
+    start_time = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    return steps * env.num_envs / (time.perf_counter() - start_time)
+
+
+def main():
+    args = parse_arguments()
+    environments = {
+        "Snake-v0": lambda: gym.make("Snake-v0", grid_size=args.grid_size),
+        "SyncVectorEnv(Snake-v0)": lambda: gym.vector.make(
+            "Snake-v0", num_envs=args.num_envs, asynchronous=False, grid_size=args.grid_size
+        ),
+        "SnakeVector-v0": lambda: gym.make(
+            "SnakeVector-v0", num_envs=args.num_envs, grid_size=args.grid_size
+        ),
+    }
+    if args.asynchronous:
+        environments["AsyncVectorEnv(Snake-v0)"] = lambda: gym.vector.make(
+            "Snake-v0", num_envs=args.num_envs, asynchronous=True, grid_size=args.grid_size
+        )
+
+    results = []
+    for name, create_env in environments.items():
+        env = create_env()
+        if isinstance(env.unwrapped, gym.vector.VectorEnv):
+            steps_per_sec = benchmark_vector_env(env=env, steps=args.steps, seed=args.seed)
+        else:
+            steps_per_sec = benchmark_env(env=env, steps=args.steps, seed=args.seed)
+        env.close()
+        results.append({"env": name, "steps_per_sec": steps_per_sec})
+        print(f"{name}: steps/sec: {steps_per_sec:.0f}")
+
+    if args.output:
+        write_report(filepath=args.output, args=args, results=results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Compare environment samples needed to reach target reward with different loss settings.
+
+Runs synchronous A2C training with the default loss and with GAE and entropy regularization
+from the same seeds, then reads training logs to find when the reward moving average first
+reaches the target.
+"""
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+import argparse
+import csv
+import random
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+from a3c.training.a2c_trainer import A2CTrainer
+from a3c.training.losses import LossConfig
+from evaluation.report import write_report
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Samples to target reward benchmark.")
+    parser.add_argument("save_dir", type=Path, help="Path where to save training runs.")
+    parser.add_argument(
+        "--grid_size", type=int, default=6, help="Specify the grid size for the game."
+    )
+    parser.add_argument(
+        "--target_reward",
+        type=float,
+        default=0.0,
+        help="Target for moving average of episode rewards.",
+    )
+    parser.add_argument(
+        "--max_episodes", type=int, default=20000, help="Episode budget of every run."
+    )
+    parser.add_argument("--seeds", type=int, default=3, help="How many seeds are run per loss.")
+    parser.add_argument("--number_of_games", type=int, default=16, help="Games played in lockstep.")
+    parser.add_argument("--gamma", type=float, default=0.99, help="Discount factor.")
+    parser.add_argument("--update_freq", type=int, default=50, help="Rollout length.")
+    parser.add_argument("--gae_lambda", type=float, default=0.95, help="GAE lambda.")
+    parser.add_argument("--entropy_coef", type=float, default=0.01, help="Entropy coefficient.")
+    parser.add_argument("--value_coef", type=float, default=0.5, help="Value loss coefficient.")
+    parser.add_argument("--output", type=Path, default=None, help="Write results to .json file.")
+    return parser.parse_args()
+
+
+def get_samples_to_target(filepath: Path, target_reward: float) -> (Optional[int], int):
+    """Return steps played until moving average reached target, and all steps played."""
+    samples = 0
+    samples_to_target = None
+    with open(filepath, newline='') as file:
+        for row in csv.DictReader(file):
+            samples += int(row['Steps'])
+            if samples_to_target is None and float(row['Moving Average']) >= target_reward:
+                samples_to_target = samples
+    return samples_to_target, samples
+
+
+def run(args: argparse.Namespace, name: str, loss_config: LossConfig, seed: int) -> dict:
+    """Train one run and return its samples to target."""
+    save_dir = args.save_dir / f"{name}_{seed}"
+    save_dir.mkdir(parents=True, exist_ok=True)
+    (save_dir / 'training_log.csv').unlink(missing_ok=True)
+    random.seed(seed)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+    trainer = A2CTrainer(
+        save_dir=save_dir,
+        grid_size=args.grid_size,
+        number_of_games=args.number_of_games,
+        seed=seed,
+        loss_config=loss_config,
+        keep_checkpoints=1,
+    )
+    trainer.train(
+        gamma=args.gamma,
+        max_episodes=args.max_episodes,
+        update_freq=args.update_freq,
+        weights_save_freq=args.max_episodes,
+    )
+    samples_to_target, samples = get_samples_to_target(
+        filepath=save_dir / 'training_log.csv', target_reward=args.target_reward
+    )
+    return {"loss": name, "seed": seed, "samples_to_target": samples_to_target, "samples": samples}
+
+
+def main():
+    args = parse_arguments()
+    losses = {
+        "default": LossConfig(),
+        "gae_entropy": LossConfig(
+            gae_lambda=args.gae_lambda, entropy_coef=args.entropy_coef, value_coef=args.value_coef
+        ),
+    }
+
+    results = []
+    for name, loss_config in losses.items():
+        for seed in range(args.seeds):
+            results.append(run(args=args, name=name, loss_config=loss_config, seed=seed))
+
+    for name in losses:
+        runs = [result for result in results if result["loss"] == name]
+        reached = [result["samples_to_target"] for result in runs if result["samples_to_target"]]
+        median = f"{np.median(reached):.0f}" if reached else "-"
+        print(
+            f"{name}: reached target in {len(reached)}/{len(runs)} runs, "
+            f"median samples to target: {median}"
+        )
+
+    if args.output:
+        write_report(filepath=args.output, args=args, results=results)
+
+
+if __name__ == '__main__':
+    main()
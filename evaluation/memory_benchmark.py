@@ -0,0 +1,138 @@
+"""Measure snake memory and per-step allocations over long Hamiltonian cycle games."""
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+import argparse
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from evaluation.agents import HamiltonianAgent
+from evaluation.report import write_report
+from game.basic_game import BasicGame
+from game.data_structures import Position
+
+# Memory allocated by these files is counted as snake storage
+SNAKE_FILES = ["*game/snake.py", "*game/data_structures.py"]
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Snake memory and allocation benchmark.")
+    parser.add_argument(
+        "--grid_sizes", type=int, nargs="+", default=[20, 30], help="Grid sizes to benchmark."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the games.")
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Path to save results as JSON file."
+    )
+    return parser.parse_args()
+
+
+def play_step(agent: HamiltonianAgent, env: BasicGame):
+    env.snake.update_direction(new_direction=agent.get_direction(env=env))
+    env.update_game()
+
+
+def play_game(agent: HamiltonianAgent, seed: int) -> (BasicGame, int, float):
+    """Play a won game and return game, steps and duration."""
+    random.seed(seed)
+    np.random.seed(seed)
+    env = agent.create_game()
+    env.reset_game()
+    steps = 0
+    start_time = time.perf_counter()
+    while not (env.game_won or env.game_lost):
+        play_step(agent=agent, env=env)
+        steps += 1
+    return env, steps, time.perf_counter() - start_time
+
+
+def measure_allocations(agent: HamiltonianAgent, seed: int) -> (int, float):
+    """Return snake storage at the end of game and mean bytes allocated during a step.
+
+    Bytes allocated during a step are the peak of traced memory above memory before the step.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    tracemalloc.start()
+    env = agent.create_game()
+    env.reset_game()
+    steps = 0
+    step_allocations = 0
+    while not (env.game_won or env.game_lost):
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        play_step(agent=agent, env=env)
+        step_allocations += tracemalloc.get_traced_memory()[1] - memory_before
+        steps += 1
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(inclusive=True, filename_pattern=pattern) for pattern in SNAKE_FILES]
+    )
+    tracemalloc.stop()
+    snake_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+    return snake_bytes, step_allocations / steps
+
+
+def count_positions(agent: HamiltonianAgent, seed: int) -> float:
+    """Return mean number of Position objects created during a step."""
+    created = 0
+    position_init = Position.__init__
+
+    def counting_init(position: Position, x: int, y: int):
+        nonlocal created
+        created += 1
+        position_init(position, x, y)
+
+    random.seed(seed)
+    np.random.seed(seed)
+    env = agent.create_game()
+    env.reset_game()
+    steps = 0
+    Position.__init__ = counting_init
+    try:
+        while not (env.game_won or env.game_lost):
+            play_step(agent=agent, env=env)
+            steps += 1
+    finally:
+        Position.__init__ = position_init
+    return created / steps
+
+
+def main():
+    args = parse_arguments()
+    results = []
+    for grid_size in args.grid_sizes:
+        agent = HamiltonianAgent(grid_size=grid_size)
+        env, steps, duration = play_game(agent=agent, seed=args.seed)
+        snake_bytes, step_allocations = measure_allocations(agent=agent, seed=args.seed)
+        step_positions = count_positions(agent=agent, seed=args.seed)
+        result = {
+            "grid_size": grid_size,
+            "steps": steps,
+            "snake_length": len(env.snake.body),
+            "steps_per_sec": steps / duration,
+            "snake_bytes": snake_bytes,
+            "step_allocation_bytes": step_allocations,
+            "step_positions": step_positions,
+        }
+        results.append(result)
+        print(
+            f"{grid_size}x{grid_size}: steps: {steps}, "
+            f"steps/sec: {result['steps_per_sec']:.0f}, "
+            f"snake memory at length {result['snake_length']}: {snake_bytes} B, "
+            f"allocated per step: {step_allocations:.0f} B, "
+            f"positions created per step: {step_positions:.2f}"
+        )
+
+    if args.output:
+        write_report(filepath=args.output, args=args, results=results)
+
+
+if __name__ == '__main__':
+    main()
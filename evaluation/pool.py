@@ -0,0 +1,46 @@
+"""Parallel evaluation of agents with a pool of processes."""
+import multiprocessing
+from typing import Optional
+
+from evaluation.agents import Agent, create_agent
+from evaluation.runner import EpisodeResult, run_seeded_episode
+
+# Agent of the pool process, created once by the pool initializer
+_agent: Optional[Agent] = None
+_max_steps: int = 0
+
+
+def _initialize_process(agent_name: str, grid_size: int, max_steps: int, agent_options: dict):
+    """Create agent for the process. A3C agent loads model weights here."""
+    global _agent
+    global _max_steps
+    _agent = create_agent(name=agent_name, grid_size=grid_size, **agent_options)
+    _max_steps = max_steps
+
+
+def _play_episode(seed: int) -> EpisodeResult:
+    """Play one episode with agent of the process."""
+    return run_seeded_episode(agent=_agent, seed=seed, max_steps=_max_steps)
+
+
+def evaluate_parallel(
+    agent_name: str,
+    grid_size: int,
+    episodes: int,
+    processes: int,
+    max_steps: int,
+    seed: int = 0,
+    **agent_options,
+) -> list[EpisodeResult]:
+    """Play episodes with seeds seed, seed + 1, ... in a pool of processes.
+
+    Results are returned in seed order and they are the same as with evaluate_agent.
+    """
+    # Tensorflow is not fork safe, so processes are spawned
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        processes=processes,
+        initializer=_initialize_process,
+        initargs=(agent_name, grid_size, max_steps, agent_options),
+    ) as pool:
+        return pool.map(_play_episode, [seed + idx for idx in range(episodes)], chunksize=1)
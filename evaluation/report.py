@@ -0,0 +1,13 @@
+"""JSON reports of benchmark scripts."""
+import argparse
+import json
+from pathlib import Path
+
+
+def write_report(filepath: Path, args: argparse.Namespace, results: list) -> None:
+    """Write benchmark arguments and results to .json file. Paths are written as strings."""
+    config = {
+        key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()
+    }
+    with open(filepath, mode="w") as file:
+        json.dump({"config": config, "results": results}, file, indent=2)
@@ -0,0 +1,94 @@
+"""Headless episode runner and result statistics."""
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from evaluation.agents import Agent
+from game.basic_game import BasicGame
+from game.rl_game import RLGame
+
+DEFAULT_MAX_STEPS = 100000
+
+
+@dataclass
+class EpisodeResult:
+    """Outcome of one episode."""
+
+    score: int
+    steps: int
+    won: bool
+    duration: float
+
+
+def run_episode(agent: Agent, env: BasicGame, max_steps: int) -> EpisodeResult:
+    """Play one headless episode until game is lost, won or step limit is reached."""
+    env.reset_game()
+    agent.reset()
+    start_length = len(env.snake.body)
+    steps = 0
+
+    start_time = time.perf_counter()
+    while steps < max_steps:
+        env.snake.update_direction(new_direction=agent.get_direction(env=env))
+        outcome = env.update_game()
+        steps += 1
+        if env.game_lost or env.game_won:
+            break
+        # RLGame ends episodes also on its own step limit
+        if isinstance(env, RLGame) and outcome[1]:
+            break
+    duration = time.perf_counter() - start_time
+
+    return EpisodeResult(
+        score=len(env.snake.body) - start_length,
+        steps=steps,
+        won=env.game_won,
+        duration=duration,
+    )
+
+
+def run_seeded_episode(agent: Agent, seed: int, max_steps: int) -> EpisodeResult:
+    """Play episode in a new game with random generators seeded for that episode only.
+
+    Result depends only on the seed, so episodes can be played in any order or process.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    return run_episode(agent=agent, env=agent.create_game(), max_steps=max_steps)
+
+
+def evaluate_agent(agent: Agent, episodes: int, max_steps: int, seed: int) -> list[EpisodeResult]:
+    """Play episodes with seeds seed, seed + 1, ... in this process."""
+    return [
+        run_seeded_episode(agent=agent, seed=seed + idx, max_steps=max_steps)
+        for idx in range(episodes)
+    ]
+
+
+def summarize_results(results: list[EpisodeResult], wall_time: Optional[float] = None) -> dict:
+    """Return throughput and score statistics of episodes.
+
+    Throughput is calculated from wall time when given, otherwise from episode durations.
+    Steps to win is averaged over won episodes and is None when no episode was won.
+    """
+    scores = np.array([result.score for result in results])
+    steps = np.array([result.steps for result in results])
+    won = np.array([result.won for result in results])
+    duration = sum(result.duration for result in results) if wall_time is None else wall_time
+
+    return {
+        "episodes": len(results),
+        "steps_per_sec": float(steps.sum() / duration) if duration else 0.0,
+        "episodes_per_sec": float(len(results) / duration) if duration else 0.0,
+        "score_mean": float(scores.mean()),
+        "score_p50": float(np.percentile(scores, 50)),
+        "score_p90": float(np.percentile(scores, 90)),
+        "score_max": int(scores.max()),
+        "win_rate": float(won.mean()),
+        "episode_length_mean": float(steps.mean()),
+        "episode_length_p50": float(np.percentile(steps, 50)),
+        "steps_to_win_mean": float(steps[won].mean()) if won.any() else None,
+    }
@@ -1,11 +1,12 @@
 """Basic implementation of the Snake game."""
-import random
 import time
+from typing import Optional
 
 import cv2
 import numpy as np
 import numpy.typing as npt
 
+from game.free_cells import FreeCells
 from game.game_base import GameBase
 from game.snake import Snake
 from game.data_structures import Position
@@ -26,8 +27,14 @@ class BasicGame(GameBase):
             shape=(grid_size * self.block_size, grid_size * self.block_size, 3), dtype=np.uint8
         )
         self.snake = snake
+        if snake.grid_size != grid_size:
+            self.snake.set_grid_size(grid_size=grid_size)
         self.food = Position(x=0, y=0)
+        self.free_cells = FreeCells(grid_size=grid_size)
         self.show_game = show_game
+        # Cells drawn in previous frame that may change in the next one: head, tail and food
+        self.drawn_cells: list[Position] = [Position(x=0, y=0) for _ in range(3)]
+        self.redraw_all: bool = True
         self.game_lost: bool = False
         self.game_won: bool = False
         self.score: int = 0
@@ -38,6 +45,8 @@ class BasicGame(GameBase):
         """
 
         self.snake.reset_snake()
+        self.free_cells.reset(occupied=self.snake.body)
+        self.redraw_all = True
         self.position_food()
         self.game_lost = False
         self.game_won = False
@@ -45,44 +54,65 @@ class BasicGame(GameBase):
 
     def position_food(self):
         """Find empty cell and update food position."""
-        free_positions = []
-        all_positions_x = np.arange(start=0, stop=self.grid_size).astype(int)
-        all_positions_y = np.arange(start=0, stop=self.grid_size).astype(int)
-        for x_pos in all_positions_x:
-            for y_pos in all_positions_y:
-                if x_pos == self.food.x and y_pos == self.food.y:
-                    continue
-                if self.snake.is_point_in_snake(x=x_pos, y=y_pos):
-                    continue
-
-                free_positions.append(Position(x=x_pos, y=y_pos))
+        # Food is never placed to its previous cell
+        old_food = Position(x=self.food.x, y=self.food.y)
+        old_food_free = self.free_cells.contains(x=old_food.x, y=old_food.y)
+        if old_food_free:
+            self.free_cells.remove(x=old_food.x, y=old_food.y)
 
         # Victory
-        if len(free_positions) == 0:
+        if len(self.free_cells) == 0:
             self.game_won = True
         else:
-            food_position = random.choice(free_positions)
+            food_position = self.free_cells.choice()
             self.food.update_position(new_x=food_position.x, new_y=food_position.y)
 
+        if old_food_free:
+            self.free_cells.add(x=old_food.x, y=old_food.y)
+
+    def update_free_cells(self, removed_tail: Optional[int]):
+        """Update free cells after snake has moved. Removed tail is a snake cell index."""
+        if removed_tail is not None and not self.snake.occupancy[removed_tail]:
+            x, y = self.snake.get_xy(cell=removed_tail)
+            self.free_cells.add(x=x, y=y)
+        self.free_cells.remove(x=self.snake.head_position.x, y=self.snake.head_position.y)
+
     def draw_elements(self):
         """
         Render the current state of the game.
         """
-        canvas = self.blank_canvas.copy()
-        for idx, position in enumerate(self.snake.body):
-            if idx == 0:
-                canvas = self._draw_block(canvas=canvas, position=position, color=GameColors.white)
-            else:
-                canvas = self._draw_block(canvas=canvas, position=position, color=GameColors.green)
-
-        food_color = GameColors.red
-        if self.snake.eaten:
-            food_color = GameColors.orange
-        canvas = self._draw_block(canvas=canvas, position=self.food, color=food_color)
+        if self.redraw_all:
+            self.redraw_all = False
+            self.game_canvas[:] = self.blank_canvas
+            for position in self.snake.body:
+                self._draw_cell(position=position)
+        else:
+            # Only the cells around head, tail and food can change between steps
+            for position in self.drawn_cells:
+                self._draw_cell(position=position)
+            self._draw_cell(position=self.snake.head_position)
+        self._draw_cell(position=self.food)
+
+        head = self.snake.head_position
+        tail_x, tail_y = self.snake.get_xy(cell=self.snake.get_body_cell(idx=-1))
+        self.drawn_cells[0].update_position(new_x=head.x, new_y=head.y)
+        self.drawn_cells[1].update_position(new_x=tail_x, new_y=tail_y)
+        self.drawn_cells[2].update_position(new_x=self.food.x, new_y=self.food.y)
 
-        self.game_canvas = canvas
         if self.show_game:
-            self.show_game_window(canvas=canvas)
+            self.show_game_window(canvas=self.game_canvas)
+
+    def _draw_cell(self, position: Position):
+        """Draw cell with the color of the element on top of it."""
+        if position.x == self.food.x and position.y == self.food.y:
+            color = GameColors.orange if self.snake.eaten else GameColors.red
+        elif self.snake.is_point_in_snake(x=position.x, y=position.y, include_head=False):
+            color = GameColors.green
+        elif position.x == self.snake.head_position.x and position.y == self.snake.head_position.y:
+            color = GameColors.white
+        else:
+            color = GameColors.black
+        self.game_canvas = self._draw_block(canvas=self.game_canvas, position=position, color=color)
 
     @staticmethod
     def show_game_window(canvas: npt.NDArray):
@@ -109,7 +139,8 @@ class BasicGame(GameBase):
         Update the game state based on the current actions or events.
         """
         self.snake.move()
-        self.snake.grow(food_position=self.food)
+        removed_tail = self.snake.grow(food_position=self.food)
+        self.update_free_cells(removed_tail=removed_tail)
 
         if self.snake.eaten:
             self.snake.eaten = False
@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, Union
 
 
 @dataclass
@@ -11,54 +13,73 @@ class GameColors:
     orange = (0, 200, 255)
 
 
-@dataclass
-class Direction:
-    """Available directions for snake."""
+class Direction(IntEnum):
+    """Available directions for snake. Values are the actions of RL game.
+
+    Direction names are accepted for compatibility, Direction("UP") returns Direction.UP and
+    Direction.UP == "UP" is True. Hash is the hash of the value, so names are not dict keys.
+    """
+
+    RIGHT = 0
+    DOWN = 1
+    LEFT = 2
+    UP = 3
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, str):
+            return self.name == other.upper()
+        return int.__eq__(self, other)
+
+    def __ne__(self, other) -> bool:
+        if isinstance(other, str):
+            return self.name != other.upper()
+        return int.__ne__(self, other)
+
+    __hash__ = int.__hash__
 
-    UP = "UP"
-    DOWN = "DOWN"
-    LEFT = "LEFT"
-    RIGHT = "RIGHT"
+    @classmethod
+    def _missing_(cls, value) -> Optional["Direction"]:
+        if isinstance(value, str):
+            return cls.__members__.get(value.upper())
+        return None
 
     @staticmethod
-    def get_x_step(direction: str) -> int:
+    def get_x_step(direction: Union["Direction", int, str]) -> int:
         """Based on direction return x step size."""
-        if direction == "UP":
-            return 0
-        elif direction == "RIGHT":
-            return 1
-        elif direction == "DOWN":
-            return 0
-        else:
-            return -1
+        return X_STEPS[Direction(direction)]
 
     @staticmethod
-    def get_y_step(direction: str) -> int:
-        """Based on direction return x step size"""
-        if direction == "UP":
-            return -1
-        elif direction == "RIGHT":
-            return 0
-        elif direction == "DOWN":
-            return 1
-        else:
-            return 0
+    def get_y_step(direction: Union["Direction", int, str]) -> int:
+        """Based on direction return y step size."""
+        return Y_STEPS[Direction(direction)]
 
     @staticmethod
-    def map_action_to_direction(action: int) -> str:
-        if action == 0:
-            return "RIGHT"
-        elif action == 1:
-            return "DOWN"
-        elif action == 2:
-            return "LEFT"
-        else:
-            return "UP"
+    def map_action_to_direction(action: int) -> "Direction":
+        return Direction(int(action))
+
+
+# Lookup tables indexed by direction
+X_STEPS = (1, 0, -1, 0)
+Y_STEPS = (0, 1, 0, -1)
+OPPOSITE_DIRECTIONS = (Direction.LEFT, Direction.UP, Direction.RIGHT, Direction.DOWN)
+
+
+@dataclass
+class ObservationMode:
+    """Available observation modes for RL game."""
+
+    PIXELS = "pixels"
+    GRID = "grid"
 
 
 class Position:
     """Store position of object"""
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -0,0 +1,62 @@
+"""Index of free grid cells."""
+import random
+from typing import Iterable, Optional
+
+from game.data_structures import Position
+
+
+class FreeCells:
+    """Free cells of the grid with constant time updates and uniform sampling.
+
+    Cells are stored as flat indices (y * grid_size + x) in a list where removed cells are
+    swapped with the last one. Slot list maps every cell to its index in that list. Cells are
+    sampled with the global random generator unless rng is given.
+    """
+
+    def __init__(self, grid_size: int, rng: Optional[random.Random] = None):
+        self.grid_size = grid_size
+        self.rng = random if rng is None else rng
+        self.cells: list[int] = []
+        self.slots: list[int] = []
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def reset(self, occupied: Iterable[Position] = ()):
+        """Mark all cells free except the occupied ones."""
+        self.cells = list(range(self.grid_size * self.grid_size))
+        self.slots = list(range(self.grid_size * self.grid_size))
+        for position in occupied:
+            self.remove(x=position.x, y=position.y)
+
+    def contains(self, x: int, y: int) -> bool:
+        """Check if cell is inside of grid and free."""
+        if 0 <= x < self.grid_size and 0 <= y < self.grid_size:
+            return self.slots[y * self.grid_size + x] >= 0
+        return False
+
+    def add(self, x: int, y: int):
+        """Mark cell free."""
+        if 0 <= x < self.grid_size and 0 <= y < self.grid_size:
+            cell = y * self.grid_size + x
+            if self.slots[cell] < 0:
+                self.slots[cell] = len(self.cells)
+                self.cells.append(cell)
+
+    def remove(self, x: int, y: int):
+        """Mark cell occupied."""
+        if not self.contains(x=x, y=y):
+            return
+        cell = y * self.grid_size + x
+        slot = self.slots[cell]
+        last_cell = self.cells.pop()
+        if last_cell != cell:
+            self.cells[slot] = last_cell
+            self.slots[last_cell] = slot
+        self.slots[cell] = -1
+
+    def choice(self) -> Position:
+        """Return random free cell."""
+        cell = self.cells[self.rng.randrange(len(self.cells))]
+        return Position(x=cell % self.grid_size, y=cell // self.grid_size)
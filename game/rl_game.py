@@ -1,6 +1,5 @@
 """Snake game used with RL agent."""
 from __future__ import annotations
-from collections import deque
 from typing import Optional
 
 import numpy as np
@@ -8,38 +7,89 @@ import numpy.typing as npt
 
 from game.basic_game import BasicGame
 from game.snake import Snake
-from game.data_structures import Direction
+from game.data_structures import Direction, ObservationMode
 
 
 class RLGame(BasicGame):
-    """Snake game compatible with reinforcement learning."""
+    """Snake game compatible with reinforcement learning.
 
-    def __init__(self, grid_size: int, snake: Snake, show_game: bool = False):
+    Observation is a stack of 4 previous frames. In pixels mode frames are rendered game canvases,
+    in grid mode frames are grid_size x grid_size tensors with head, body and food channels and
+    optional body age channel. Float frames are scaled to [0, 1], uint8 frames to [0, 255].
+
+    Frames are kept in a ring buffer where every frame is written twice, to slot i and i + 4, so
+    the 4 latest frames are always a contiguous slice. Observation is a view to that slice and
+    it is valid only until the next call of get_observation. Copy it to keep it longer.
+    """
+
+    def __init__(
+        self,
+        grid_size: int,
+        snake: Snake,
+        show_game: bool = False,
+        observation_mode: str = ObservationMode.PIXELS,
+        observation_dtype: Optional[npt.DTypeLike] = None,
+        body_age: bool = False,
+    ):
         super().__init__(grid_size=grid_size, snake=snake, show_game=show_game)
-        self.observation_que: deque = deque(maxlen=4)
+        self.frame_stack: int = 4
         self.step: int = 0
         self.step_limit: Optional[int] = 5000
 
+        if observation_mode not in (ObservationMode.PIXELS, ObservationMode.GRID):
+            raise ValueError(f"Unknown observation mode: {observation_mode}")
+        if observation_dtype is None:
+            observation_dtype = (
+                np.float64 if observation_mode == ObservationMode.PIXELS else np.float32
+            )
+        self.observation_mode = observation_mode
+        self.observation_dtype = np.dtype(observation_dtype)
+        self.body_age = body_age
+
+        if observation_mode == ObservationMode.PIXELS:
+            frame_shape = self.game_canvas.shape
+        else:
+            frame_shape = (grid_size, grid_size, 4 if body_age else 3)
+        self.frame_buffer = np.zeros(
+            shape=(2 * self.frame_stack, *frame_shape), dtype=self.observation_dtype
+        )
+        self.frame_slot: int = 0
+        self.frames_stored: int = 0
+
+        # Head move when snake entered each cell. Cell belongs to snake if it was entered during
+        # the last len(body) moves, which gives body age without iterating over the body.
+        self.head_moves: int = 0
+        self.cell_entry = np.zeros(shape=(grid_size, grid_size), dtype=np.int64)
+
     def reset_game(self):
         """
         Reset the game to its initial state.
         """
-        self.observation_que.clear()
+        self.frames_stored = 0
+        self.step = 0
         self.snake.reset_snake()
-        self.draw_elements()
+        self.free_cells.reset(occupied=self.snake.body)
+        self.reset_cell_entry()
         self.position_food()
         self.game_lost = False
         self.game_won = False
         self.score = 0
+        # Render once after food is placed, first observation frame copies this canvas
+        self.redraw_all = True
+        self.draw_elements()
 
     def update_game(self) -> (float, bool):
         """Play one step then return reward and done flag."""
+        self.step += 1
         self.snake.move()
-        self.snake.grow(food_position=self.food)
+        removed_tail = self.snake.grow(food_position=self.food)
+        self.update_free_cells(removed_tail=removed_tail)
+        self.update_cell_entry()
 
         reward = 0.0
         done = False
         if self.check_if_lost():
+            self.game_lost = True
             reward = -1.0
             done = True
 
@@ -49,7 +99,7 @@ class RLGame(BasicGame):
             reward = 1.0
             self.score += 1
 
-        if self.step > self.step_limit:
+        if self.step_limit is not None and self.step > self.step_limit:
             done = True
 
         if self.game_won:
@@ -61,15 +111,70 @@ class RLGame(BasicGame):
 
         return reward, done
 
+    def reset_cell_entry(self):
+        """Set entry moves for initial body."""
+        self.head_moves = 0
+        # Empty cells are older than any body part can be
+        self.cell_entry.fill(-self.grid_size * self.grid_size)
+        for idx, position in enumerate(self.snake.body):
+            self.cell_entry[position.y, position.x] = -idx
+
+    def update_cell_entry(self):
+        """Record head move to the cell where head entered."""
+        self.head_moves += 1
+        head = self.snake.head_position
+        if 0 <= head.x < self.grid_size and 0 <= head.y < self.grid_size:
+            self.cell_entry[head.y, head.x] = self.head_moves
+
+    def draw_elements(self):
+        """
+        Render the current state of the game.
+        """
+        # Grid observations are built from game state, canvas is needed only for the window
+        if self.observation_mode == ObservationMode.PIXELS or self.show_game:
+            super().draw_elements()
+
+    def draw_grid(self, frame: npt.NDArray):
+        """Write game state to grid_size x grid_size x channels frame."""
+        scale = 255 if np.issubdtype(self.observation_dtype, np.integer) else 1.0
+        frame.fill(0)
+
+        length = len(self.snake.body)
+        age = self.cell_entry - (self.head_moves - length)
+        body = age > 0
+
+        head = self.snake.head_position
+        if 0 <= head.x < self.grid_size and 0 <= head.y < self.grid_size:
+            body[head.y, head.x] = False
+            frame[head.y, head.x, 0] = scale
+        frame[..., 1] = body * scale
+        frame[self.food.y, self.food.x, 2] = scale
+        if self.body_age:
+            frame[..., 3] = np.clip(age, 0, None) * (scale / length)
+
+    def push_frame(self):
+        """Write current game state to the next slot of the frame buffer."""
+        self.frame_slot = (self.frame_slot + 1) % self.frame_stack
+        frame = self.frame_buffer[self.frame_slot]
+        if self.observation_mode == ObservationMode.GRID:
+            self.draw_grid(frame=frame)
+        else:
+            frame[:] = self.game_canvas
+            if not np.issubdtype(self.observation_dtype, np.integer):
+                frame /= 255
+        self.frame_buffer[self.frame_slot + self.frame_stack] = frame
+        self.frames_stored += 1
+
     def get_observation(self) -> npt.NDArray:
         """Return 4 previous game states."""
-        if len(self.observation_que) == 0:
-            self.observation_que.append(self.game_canvas / 255)
+        if self.frames_stored == 0:
+            self.push_frame()
             self.snake.update_direction(new_direction=Direction.DOWN)
-            for i in range(self.observation_que.maxlen - 1):
+            for i in range(self.frame_stack - 1):
                 _, _ = self.update_game()
-                self.observation_que.append(self.game_canvas / 255)
+                self.push_frame()
         else:
-            self.observation_que.append(self.game_canvas / 255)
+            self.push_frame()
 
-        return np.asarray(list(self.observation_que))
+        start = self.frame_slot + 1
+        return self.frame_buffer[start : start + self.frame_stack]
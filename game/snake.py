@@ -1,77 +1,173 @@
 """Implementation for snake class."""
+from array import array
+from typing import Iterator, Optional, Union
 
-from game.data_structures import Direction, Position
+from game.data_structures import OPPOSITE_DIRECTIONS, X_STEPS, Y_STEPS, Direction, Position
+
+# Initial body from head to tail, all on the top row
+INITIAL_BODY_X = (3, 2, 1)
+# Storage of snake created without grid, same as the default grid of games
+DEFAULT_GRID_SIZE = 6
+
+
+class SnakeBody:
+    """Read-only view of snake body as positions from head to tail."""
+
+    __slots__ = ("snake",)
+
+    def __init__(self, snake: "Snake"):
+        self.snake = snake
+
+    def __len__(self) -> int:
+        return self.snake.length
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Position, list[Position]]:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.snake.length))]
+        return self.snake.get_position(cell=self.snake.get_body_cell(idx=idx))
+
+    def __iter__(self) -> Iterator[Position]:
+        cells, stride = self.snake.cells, self.snake.stride
+        head_slot = self.snake.tail_slot + self.snake.length - 1
+        for slot in range(head_slot, head_slot - self.snake.length, -1):
+            y, x = divmod(cells[slot % len(cells)], stride)
+            yield Position(x=x - 1, y=y - 1)
 
 
 class Snake:
-    """Snake class implementation."""
+    """Snake class implementation.
+
+    Body is stored as packed cells in a preallocated circular array from tail to head. Cell of
+    (x, y) is (y + 1) * stride + x + 1 in the grid padded by one cell, so a head that left the grid
+    is stored too. Storage is allocated for the grid of the game, and body reads create positions.
+    Snake without grid_size uses DEFAULT_GRID_SIZE until the game calls set_grid_size.
+    """
 
-    def __init__(self):
-        self.head_position: Position = Position(x=3, y=0)
-        self.body: list[Position] = self._initialize_body()
-        self.direction: str = Direction.RIGHT
+    def __init__(self, grid_size: Optional[int] = None):
+        self.head_position: Position = Position(x=INITIAL_BODY_X[0], y=0)
+        self.direction: Direction = Direction.RIGHT
         self.eaten: bool = False
+        self.body = SnakeBody(snake=self)
+
+        self.grid_size: int = 0
+        self.stride: int = 0
+        self.cells = array("i")
+        # Number of body parts in each padded cell, updated together with body
+        self.occupancy = bytearray()
+        self.tail_slot: int = 0
+        self.length: int = 0
+        self.set_grid_size(grid_size=grid_size if grid_size is not None else DEFAULT_GRID_SIZE)
+
+    def set_grid_size(self, grid_size: int) -> None:
+        """Allocate body storage for grid and reset snake."""
+        self.grid_size = grid_size
+        self.stride = grid_size + 2
+        # Body can fill the grid and grows before the tail moves
+        self.cells = array("i", bytes(self.cells.itemsize * (grid_size * grid_size + 1)))
+        self.occupancy = bytearray(self.stride * self.stride)
+        self.reset_snake()
 
     def reset_snake(self) -> None:
         """Reset snake to initial state."""
-        self.head_position = Position(x=3, y=0)
-        self.body = self._initialize_body()
+        self.head_position = Position(x=INITIAL_BODY_X[0], y=0)
         self.eaten = False
         self.direction = Direction.RIGHT
 
-    @staticmethod
-    def _initialize_body() -> list[Position]:
-        """Initialize and return body coordinates."""
-        return [
-            Position(x=3, y=0),
-            Position(x=2, y=0),
-            Position(x=1, y=0),
-        ]
+        for idx in range(self.length):
+            self.occupancy[self.get_body_cell(idx=idx)] = 0
+        self.tail_slot = 0
+        self.length = 0
+        for x in reversed(INITIAL_BODY_X):
+            self._add_head(cell=self.get_cell(x=x, y=0))
+
+    def get_cell(self, x: int, y: int) -> int:
+        """Pack position to cell index."""
+        return (y + 1) * self.stride + x + 1
+
+    def get_xy(self, cell: int) -> (int, int):
+        """Unpack cell index to x and y."""
+        y, x = divmod(cell, self.stride)
+        return x - 1, y - 1
+
+    def get_position(self, cell: int) -> Position:
+        """Unpack cell index to position."""
+        x, y = self.get_xy(cell=cell)
+        return Position(x=x, y=y)
+
+    def get_body_cell(self, idx: int) -> int:
+        """Return cell of body part idx counted from head. Negative idx counts from tail."""
+        if idx < 0:
+            idx += self.length
+        if not 0 <= idx < self.length:
+            raise IndexError("Snake body index out of range.")
+        return self.cells[(self.tail_slot + self.length - 1 - idx) % len(self.cells)]
+
+    def get_body_cells(self) -> list[int]:
+        """Return grid cell indices (y * grid_size + x) of body from head to tail.
+
+        Head outside the grid is -1.
+        """
+        cells, stride, grid_size = self.cells, self.stride, self.grid_size
+        head_slot = self.tail_slot + self.length - 1
+        body = []
+        for slot in range(head_slot, head_slot - self.length, -1):
+            y, x = divmod(cells[slot % len(cells)], stride)
+            if 0 < x <= grid_size and 0 < y <= grid_size:
+                body.append((y - 1) * grid_size + x - 1)
+            else:
+                body.append(-1)
+        return body
+
+    def _add_head(self, cell: int) -> None:
+        self.cells[(self.tail_slot + self.length) % len(self.cells)] = cell
+        self.length += 1
+        self.occupancy[cell] += 1
 
     def move(self):
         """Update head and body position."""
         # self.update_direction(new_direction=new_direction)
         self.head_position.update_position(
-            new_x=self.head_position.x + Direction.get_x_step(direction=self.direction),
-            new_y=self.head_position.y + Direction.get_y_step(direction=self.direction),
+            new_x=self.head_position.x + X_STEPS[self.direction],
+            new_y=self.head_position.y + Y_STEPS[self.direction],
         )
 
-    def update_direction(self, new_direction: str) -> None:
-        """Update snake direction."""
-        if self.direction == new_direction:
-            pass
-
-        elif self.direction == Direction.DOWN and new_direction == Direction.UP:
-            pass
-
-        elif self.direction == Direction.UP and new_direction == Direction.DOWN:
-            pass
+    def update_direction(self, new_direction: Union[Direction, int, str]) -> None:
+        """Update snake direction. Turning back is ignored.
 
-        elif self.direction == Direction.LEFT and new_direction == Direction.RIGHT:
-            pass
-
-        elif self.direction == Direction.RIGHT and new_direction == Direction.LEFT:
-            pass
-
-        else:
+        Direction names and action codes are converted to Direction.
+        """
+        if type(new_direction) is not Direction:
+            new_direction = Direction(new_direction)
+        if new_direction != OPPOSITE_DIRECTIONS[self.direction]:
             self.direction = new_direction
 
-    def grow(self, food_position: Position):
-        """Update body position and grow snake if eaten."""
-        self.body.insert(0, Position(x=self.head_position.x, y=self.head_position.y))
-        if self.head_position.x == food_position.x and self.head_position.y == food_position.y:
+    def grow(self, food_position: Position) -> Optional[int]:
+        """Update body position and grow snake if eaten. Return removed tail cell."""
+        head = self.head_position
+        if not (-1 <= head.x <= self.grid_size and -1 <= head.y <= self.grid_size):
+            raise ValueError(
+                f"Head ({head.x}, {head.y}) is outside the grid of size {self.grid_size}."
+            )
+        cells = self.cells
+        head_cell = (head.y + 1) * self.stride + head.x + 1
+        cells[(self.tail_slot + self.length) % len(cells)] = head_cell
+        self.occupancy[head_cell] += 1
+
+        if head.x == food_position.x and head.y == food_position.y:
             self.eaten = True
-        else:
-            self.body.pop()
+            self.length += 1
+            return None
+
+        tail_cell = cells[self.tail_slot]
+        self.tail_slot = (self.tail_slot + 1) % len(cells)
+        self.occupancy[tail_cell] -= 1
+        return tail_cell
 
     def is_point_in_snake(self, x: int, y: int, include_head: bool = True) -> bool:
         """Check if point is inside snake."""
-        if include_head:
-            body_parts = self.body
-        else:
-            body_parts = self.body[1:]
-
-        for body_position in body_parts:
-            if x == body_position.x and y == body_position.y:
-                return True
-        return False
+        if not (-1 <= x <= self.grid_size and -1 <= y <= self.grid_size):
+            return False
+        count = self.occupancy[(y + 1) * self.stride + x + 1]
+        if not include_head and x == self.head_position.x and y == self.head_position.y:
+            count -= 1
+        return count > 0
@@ -0,0 +1,148 @@
+"""Gym environments of the Snake game.
+
+Importing this module registers Snake-v0 for single games and SnakeVector-v0 for a batch of
+games stepped together. Both can also be created with gym.make("game.snake_env:Snake-v0").
+"""
+import random
+from typing import Optional, Union
+
+import cv2
+import gym
+import numpy as np
+import numpy.typing as npt
+from gym import spaces
+from gym.vector import VectorEnv
+
+from game.basic_game import BasicGame
+from game.data_structures import Direction, ObservationMode
+from game.rl_game import RLGame
+from game.snake import Snake
+from game.vector_rl_game import VectorRLGame
+
+
+def create_observation_space(shape: tuple, dtype: npt.DTypeLike) -> spaces.Box:
+    """Return space of frame stacks. Float frames are scaled to [0, 1], integer to [0, 255]."""
+    high = 255 if np.issubdtype(dtype, np.integer) else 1.0
+    return spaces.Box(low=0, high=high, shape=shape, dtype=dtype)
+
+
+class SnakeEnv(gym.Env):
+    """Single Snake game with the rewards and observations of RLGame.
+
+    Actions are Direction codes. Episode terminates when the game is lost or won and is truncated
+    at the step limit of the game. Observations are copies of RLGame observations.
+    """
+
+    metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 100}
+
+    def __init__(
+        self,
+        grid_size: int = 6,
+        observation_mode: str = ObservationMode.PIXELS,
+        observation_dtype: Optional[npt.DTypeLike] = None,
+        body_age: bool = False,
+        step_limit: Optional[int] = 5000,
+        render_mode: Optional[str] = None,
+    ):
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        self.render_mode = render_mode
+        self.game = RLGame(
+            grid_size=grid_size,
+            snake=Snake(grid_size=grid_size),
+            show_game=render_mode == "human",
+            observation_mode=observation_mode,
+            observation_dtype=observation_dtype,
+            body_age=body_age,
+        )
+        self.game.step_limit = step_limit
+        # Food placement of every environment has its own generator seeded in reset
+        self.game.free_cells.rng = random.Random()
+
+        self.observation_space = create_observation_space(
+            shape=(self.game.frame_stack, *self.game.frame_buffer.shape[1:]),
+            dtype=self.game.observation_dtype,
+        )
+        self.action_space = spaces.Discrete(len(Direction))
+
+    def reset(
+        self, *, seed: Optional[int] = None, options: Optional[dict] = None
+    ) -> (npt.NDArray, dict):
+        super().reset(seed=seed)
+        if seed is not None:
+            self.game.free_cells.rng.seed(seed)
+        # Food is never placed to its previous cell, so every episode starts from the same cell
+        self.game.food.update_position(new_x=0, new_y=0)
+        self.game.reset_game()
+        return self.game.get_observation().copy(), {"score": self.game.score}
+
+    def step(self, action: int) -> (npt.NDArray, float, bool, bool, dict):
+        self.game.snake.update_direction(new_direction=Direction(int(action)))
+        reward, done = self.game.update_game()
+        terminated = self.game.game_lost or self.game.game_won
+        observation = self.game.get_observation().copy()
+        return observation, reward, terminated, done and not terminated, {"score": self.game.score}
+
+    def render(self) -> Optional[npt.NDArray]:
+        """Return canvas in rgb_array mode. Game window is drawn during steps in human mode."""
+        if self.render_mode != "rgb_array":
+            return None
+        if self.game.observation_mode != ObservationMode.PIXELS:
+            # Canvas is not drawn for grid observations
+            self.game.redraw_all = True
+            BasicGame.draw_elements(self.game)
+        return cv2.cvtColor(self.game.game_canvas, cv2.COLOR_BGR2RGB)
+
+    def close(self):
+        if self.render_mode == "human":
+            cv2.destroyAllWindows()
+
+
+class SnakeVectorEnv(VectorEnv):
+    """Batch of pixel observation Snake games stepped together with VectorRLGame.
+
+    Finished games are reset automatically and their observations belong to the next episode.
+    Final observations of finished episodes are not returned.
+    """
+
+    def __init__(
+        self,
+        num_envs: int = 8,
+        grid_size: int = 6,
+        observation_dtype: npt.DTypeLike = np.float64,
+        step_limit: Optional[int] = 5000,
+    ):
+        self.game = VectorRLGame(
+            number_of_games=num_envs, grid_size=grid_size, observation_dtype=observation_dtype
+        )
+        self.game.step_limit = step_limit
+        super().__init__(
+            num_envs=num_envs,
+            observation_space=create_observation_space(
+                shape=self.game.frames.shape[1:], dtype=self.game.observation_dtype
+            ),
+            action_space=spaces.Discrete(len(Direction)),
+        )
+        self.actions = np.zeros(shape=num_envs, dtype=np.int32)
+
+    def reset_wait(
+        self, seed: Optional[Union[int, list[int]]] = None, options: Optional[dict] = None
+    ) -> (npt.NDArray, dict):
+        if seed is not None:
+            self.game.rng = np.random.default_rng(seed)
+        return self.game.reset_game(), {}
+
+    def step_async(self, actions: npt.ArrayLike):
+        self.actions = np.asarray(actions, dtype=np.int32)
+
+    def step_wait(self) -> (npt.NDArray, npt.NDArray, npt.NDArray, npt.NDArray, dict):
+        observations, rewards, dones = self.game.step(actions=self.actions)
+        truncated = self.game.truncated.copy()
+        return observations, rewards, dones & ~truncated, truncated, {}
+
+
+gym.register(id="Snake-v0", entry_point="game.snake_env:SnakeEnv")
+# Environment checker expects single environments
+gym.register(
+    id="SnakeVector-v0", entry_point="game.snake_env:SnakeVectorEnv", disable_env_checker=True
+)
@@ -0,0 +1,218 @@
+"""Vectorized Snake game used with RL agents."""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from game.data_structures import X_STEPS, Y_STEPS, Direction, GameColors
+
+
+class VectorRLGame:
+    """Batch of Snake games stepped together with NumPy.
+
+    Every game follows the rules and rewards of RLGame.update_game. Finished games are reset
+    automatically, so observations returned from step belong to the next episode for them.
+    """
+
+    # Actions are Direction codes
+    x_steps = np.array(X_STEPS, dtype=np.int32)
+    y_steps = np.array(Y_STEPS, dtype=np.int32)
+
+    # Cell codes used for rendering
+    empty_cell = 0
+    head_cell = 1
+    body_cell = 2
+    food_cell = 3
+
+    def __init__(
+        self,
+        number_of_games: int,
+        grid_size: int,
+        seed: Optional[int] = None,
+        observation_dtype: npt.DTypeLike = np.float64,
+    ):
+        self.number_of_games = number_of_games
+        self.grid_size = grid_size
+        self.block_size = 10  # Same as BasicGame
+        self.frame_stack = 4  # Same as RLGame observation queue
+        self.step_limit: Optional[int] = 5000
+        self.rng = np.random.default_rng(seed)
+        # Integer observations are unscaled like RLGame pixel frames
+        self.observation_dtype = np.dtype(observation_dtype)
+
+        cells = grid_size * grid_size
+        self.all_games = np.arange(number_of_games)
+
+        # Body is a ring buffer of flat cell indices (y * grid_size + x), head at head_slot
+        self.body = np.zeros(shape=(number_of_games, cells), dtype=np.int32)
+        self.head_slot = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.length = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.occupancy = np.zeros(shape=(number_of_games, cells), dtype=bool)
+
+        self.head_x = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.head_y = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.direction = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.food = np.zeros(shape=number_of_games, dtype=np.int32)
+
+        self.score = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.steps = np.zeros(shape=number_of_games, dtype=np.int32)
+        self.game_lost = np.zeros(shape=number_of_games, dtype=bool)
+        self.game_won = np.zeros(shape=number_of_games, dtype=bool)
+        # Games that were finished by step limit in the last step
+        self.truncated = np.zeros(shape=number_of_games, dtype=bool)
+
+        canvas_size = grid_size * self.block_size
+        self.frames = np.zeros(
+            shape=(number_of_games, self.frame_stack, canvas_size, canvas_size, 3), dtype=np.uint8
+        )
+        self.palette = np.array(
+            [GameColors.black, GameColors.white, GameColors.green, GameColors.red], dtype=np.uint8
+        )
+        # Cell index of every pixel. Blocks leave one pixel border on top and left like
+        # BasicGame._draw_block, border pixels point to an extra always empty cell.
+        pixel_cells = np.arange(canvas_size) // self.block_size
+        pixel_cells = pixel_cells[:, None] * grid_size + pixel_cells[None, :]
+        border = np.arange(canvas_size) % self.block_size == 0
+        pixel_cells[border, :] = cells
+        pixel_cells[:, border] = cells
+        self.pixel_cells = pixel_cells.ravel()
+
+    def reset_game(self) -> npt.NDArray:
+        """Reset all games and return their observations."""
+        self.food[:] = 0
+        self._reset_games(games=self.all_games)
+        return self.get_observation()
+
+    def step(self, actions: npt.NDArray) -> (npt.NDArray, npt.NDArray, npt.NDArray):
+        """Play one step in every game then return observations, rewards and done flags."""
+        rewards, dones = self._advance(
+            games=self.all_games, directions=np.asarray(actions, dtype=np.int32)
+        )
+        self._push_frames(games=self.all_games)
+        self.truncated[:] = dones & ~(self.game_lost | self.game_won)
+
+        finished = np.flatnonzero(dones)
+        if finished.size:
+            self._reset_games(games=finished)
+
+        return self.get_observation(), rewards, dones
+
+    def get_observation(self) -> npt.NDArray:
+        """Return 4 previous game states for every game."""
+        if np.issubdtype(self.observation_dtype, np.integer):
+            return self.frames.astype(self.observation_dtype)
+        return np.divide(self.frames, 255, dtype=self.observation_dtype)
+
+    def _reset_games(self, games: npt.NDArray):
+        """Reset given games and play the same warm-up steps as RLGame.get_observation."""
+        self.occupancy[games] = False
+        self.body[games, :3] = [3, 2, 1]
+        self.occupancy[games[:, None], self.body[games, :3]] = True
+        self.head_slot[games] = 0
+        self.length[games] = 3
+        self.head_x[games] = 3
+        self.head_y[games] = 0
+        self.direction[games] = 0
+        self.steps[games] = 0
+        # Food eaten during warm-up is counted like in RLGame
+        self.score[games] = 0
+        self.game_lost[games] = False
+        self.game_won[games] = False
+        self._position_food(games=games)
+
+        self.frames[games, -1] = self._render(games=games)
+        warm_up = np.full(shape=games.size, fill_value=Direction.DOWN, dtype=np.int32)
+        for _ in range(self.frame_stack - 1):
+            self._advance(games=games, directions=warm_up)
+            self._push_frames(games=games)
+
+    def _advance(self, games: npt.NDArray, directions: npt.NDArray) -> (npt.NDArray, npt.NDArray):
+        """Move snakes of given games one step and return rewards and done flags."""
+        cells = self.occupancy.shape[1]
+
+        # Turning back is ignored like in Snake.update_direction
+        direction = self.direction[games]
+        direction = np.where(directions == (direction + 2) % 4, direction, directions)
+        self.direction[games] = direction
+
+        head_x = self.head_x[games] + self.x_steps[direction]
+        head_y = self.head_y[games] + self.y_steps[direction]
+        self.head_x[games] = head_x
+        self.head_y[games] = head_y
+        self.steps[games] += 1
+
+        outside = (head_x < 0) | (head_x >= self.grid_size)
+        outside |= (head_y < 0) | (head_y >= self.grid_size)
+        head_cell = np.where(outside, 0, head_y * self.grid_size + head_x)
+        eaten = ~outside & (head_cell == self.food[games])
+
+        # Tail moves before collision check, so snake can follow its own tail
+        moving = games[~eaten]
+        tail_slot = (self.head_slot[moving] + self.length[moving] - 1) % cells
+        self.occupancy[moving, self.body[moving, tail_slot]] = False
+        self.length[moving] -= 1
+
+        collided = ~outside & self.occupancy[games, head_cell]
+        lost = outside | collided
+
+        inside = games[~outside]
+        self.head_slot[inside] = (self.head_slot[inside] - 1) % cells
+        self.body[inside, self.head_slot[inside]] = head_cell[~outside]
+        self.occupancy[inside, head_cell[~outside]] = True
+        self.length[inside] += 1
+
+        rewards = np.where(lost, -1.0, 0.0)
+        self.game_lost[games] = lost
+
+        fed = games[eaten]
+        rewards[eaten] = 1.0
+        self.score[fed] += 1
+        won = np.zeros(shape=games.size, dtype=bool)
+        won[eaten] = self._position_food(games=fed)
+
+        dones = lost | won
+        if self.step_limit is not None:
+            dones |= self.steps[games] > self.step_limit
+
+        self.score[games[won]] += 1
+        return rewards, dones
+
+    def _position_food(self, games: npt.NDArray) -> npt.NDArray:
+        """Place food to random empty cells and return which games were won."""
+        free_cells = ~self.occupancy[games]
+        # Like BasicGame.position_food, food is never placed to its previous cell
+        free_cells[np.arange(games.size), self.food[games]] = False
+        free_counts = free_cells.sum(axis=1)
+
+        won = free_counts == 0
+        self.game_won[games[won]] = True
+
+        choice = self.rng.integers(low=0, high=np.maximum(free_counts, 1))
+        new_food = np.argmax(np.cumsum(free_cells, axis=1) > choice[:, None], axis=1)
+        placed = ~won
+        self.food[games[placed]] = new_food[placed]
+        return won
+
+    def _push_frames(self, games: npt.NDArray):
+        """Render given games and append the frames to their observation stacks."""
+        self.frames[games, :-1] = self.frames[games, 1:]
+        self.frames[games, -1] = self._render(games=games)
+
+    def _render(self, games: npt.NDArray) -> npt.NDArray:
+        """Render given games like BasicGame.draw_elements."""
+        codes = np.zeros(shape=(games.size, self.occupancy.shape[1] + 1), dtype=np.uint8)
+        codes[:, :-1] = self.occupancy[games] * np.uint8(self.body_cell)
+
+        head_x = self.head_x[games]
+        head_y = self.head_y[games]
+        visible = (head_x >= 0) & (head_x < self.grid_size)
+        visible &= (head_y >= 0) & (head_y < self.grid_size)
+        # Colliding head is covered by the body like in BasicGame.draw_elements
+        visible &= ~self.game_lost[games]
+        rows = np.flatnonzero(visible)
+        codes[rows, head_y[rows] * self.grid_size + head_x[rows]] = self.head_cell
+        codes[np.arange(games.size), self.food[games]] = self.food_cell
+
+        pixels = np.take(self.palette[codes], self.pixel_cells, axis=1)
+        return pixels.reshape((games.size,) + self.frames.shape[2:])
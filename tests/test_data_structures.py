@@ -0,0 +1,19 @@
+"""Tests for Direction compatibility with direction names."""
+from game.data_structures import Direction
+from game.snake import Snake
+
+
+def test_direction_equals_its_name():
+    assert Direction.UP == "UP"
+    assert "UP" == Direction.UP
+    assert Direction.UP != "DOWN"
+    assert Direction.UP == 3
+    assert Direction("left") is Direction.LEFT
+
+
+def test_snake_direction_compares_to_name():
+    snake = Snake()
+    snake.update_direction(new_direction="DOWN")
+
+    assert snake.direction == "DOWN"
+    assert snake.direction != "RIGHT"
@@ -0,0 +1,63 @@
+"""Tests for snake created without a game."""
+import pytest
+
+from game.data_structures import Direction, Position
+from game.snake import Snake
+
+
+def positions(snake: Snake) -> list[tuple[int, int]]:
+    return [(position.x, position.y) for position in snake.body]
+
+
+def test_standalone_snake_has_initial_body():
+    snake = Snake()
+
+    assert positions(snake) == [(3, 0), (2, 0), (1, 0)]
+    assert snake.is_point_in_snake(x=2, y=0)
+    assert not snake.is_point_in_snake(x=3, y=0, include_head=False)
+    assert not snake.is_point_in_snake(x=0, y=0)
+
+
+def test_standalone_snake_moves_and_grows():
+    snake = Snake()
+    snake.update_direction(new_direction=Direction.DOWN)
+
+    snake.move()
+    removed_tail = snake.grow(food_position=Position(x=0, y=5))
+    assert snake.get_xy(cell=removed_tail) == (1, 0)
+    assert positions(snake) == [(3, 1), (3, 0), (2, 0)]
+
+    snake.move()
+    assert snake.grow(food_position=Position(x=3, y=2)) is None
+    assert snake.eaten
+    assert positions(snake) == [(3, 2), (3, 1), (3, 0), (2, 0)]
+
+
+def test_body_supports_slices():
+    snake = Snake()
+
+    assert [(position.x, position.y) for position in snake.body[1:]] == [(2, 0), (1, 0)]
+    assert [(position.x, position.y) for position in snake.body[::-1]] == [
+        (1, 0),
+        (2, 0),
+        (3, 0),
+    ]
+
+
+def test_set_grid_size_resets_snake():
+    snake = Snake()
+    snake.move()
+    snake.grow(food_position=Position(x=4, y=0))
+
+    snake.set_grid_size(grid_size=10)
+
+    assert positions(snake) == [(3, 0), (2, 0), (1, 0)]
+    assert snake.get_body_cells() == [3, 2, 1]
+
+
+def test_grow_outside_grid_storage_raises():
+    snake = Snake(grid_size=4)
+    snake.head_position.update_position(new_x=6, new_y=0)
+
+    with pytest.raises(ValueError):
+        snake.grow(food_position=Position(x=0, y=0))